@@ -0,0 +1,290 @@
+import argparse
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from src.GraphBuilder.utils.graph_data import GraphData
+from src.graph_rag import SmartGraphRAG
+from src.metrics import QueryTrace
+from src.node_table import node_key
+
+Triplet = Tuple[str, str, str]
+
+
+def _iter_questions(csv_path: str) -> Iterable[Tuple[str, Optional[str]]]:
+    """``(question, ground_truth)`` pairs; the answer is ``None`` when the CSV has no ``Ground_Truth`` column."""
+    df = pd.read_csv(csv_path, encoding="utf-8-sig")
+    question_col = "Question" if "Question" in df.columns else df.columns[0]
+    answers = df["Ground_Truth"] if "Ground_Truth" in df.columns else pd.Series(None, index=df.index)
+    for value, answer in zip(df[question_col], answers):
+        if not isinstance(value, str) or not value.strip():
+            continue
+        yield value.strip(), answer.strip() if isinstance(answer, str) and answer.strip() else None
+
+
+def synthetic_triplets(triplets: List[Triplet], scale: int, rewire: float = 0.1, seed: int = 0) -> Iterator[Triplet]:
+    """
+    ``scale`` copies of the graph; copy ``k > 0`` suffixes every name with
+    `` #k``. A ``rewire`` fraction of the edges in each extra copy points at
+    the same target in a random copy, so the copies form one connected graph
+    whose hubs grow with ``scale`` while copy 0 keeps the real names the
+    questions refer to.
+    """
+    rng = random.Random(seed)
+    for copy in range(scale):
+        suffix = f" #{copy}" if copy else ""
+        for src, des, rel in triplets:
+            target_suffix = suffix
+            if copy and rng.random() < rewire:
+                other = rng.randrange(scale)
+                target_suffix = f" #{other}" if other else ""
+            yield src + suffix, des + target_suffix, rel
+
+
+def neighbor_coverage(
+    rag: SmartGraphRAG,
+    items: List[Tuple[str, str]],
+    depth: int,
+    max_edges: Optional[int],
+    fanout: Optional[int],
+) -> Dict[str, float]:
+    """
+    Share of questions whose ground truth is an endpoint (by folded
+    substring) of at least one neighbor candidate, before rerank, with the
+    given candidate budget and per-node fanout.
+    """
+    backend = rag.graph_backend
+    configured = backend.fanout
+    backend.fanout = fanout
+    hits = 0
+    candidates = []
+    try:
+        for question, answer in items:
+            anchors = rag._search_anchor_nodes(rag._extract_entities(question))
+            edges = rag._collect_neighbor_edges(backend.resolve(anchors), depth, max_edges=max_edges)
+            candidates.append(len(edges))
+            needle = node_key(answer)
+            if needle and any(needle in node_key(u) or needle in node_key(v) for u, v, _ in edges):
+                hits += 1
+    finally:
+        backend.fanout = configured
+    return {
+        "coverage": round(hits / len(items), 3) if items else None,
+        "mean_candidates": round(float(np.mean(candidates)), 2) if candidates else None,
+        "n": len(items),
+    }
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    arr = np.asarray(values) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(arr, 50)), 3),
+        "p95_ms": round(float(np.percentile(arr, 95)), 3),
+        "p99_ms": round(float(np.percentile(arr, 99)), 3),
+        "mean_ms": round(float(arr.mean()), 3),
+        "n": len(values),
+    }
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss là KB trên Linux, byte trên macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def _build_rag(args) -> SmartGraphRAG:
+    embedding_model = None
+    vector_store = None
+    if args.embeddings == "stub":
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from langchain_core.vectorstores import InMemoryVectorStore
+
+        embedding_model = DeterministicFakeEmbedding(size=768)
+        vector_store = InMemoryVectorStore(embedding_model)
+
+    if args.llm == "stub":
+        from langchain_core.runnables import RunnableLambda
+
+        # Trả về "Không có" cho cả prompt trích xuất thực thể lẫn prompt trả lời
+        llm = RunnableLambda(lambda _prompt: "Không có")
+    else:
+        from src.graph_rag import load_tiny_vietnamese_llm
+
+        llm = load_tiny_vietnamese_llm()
+
+    rag = SmartGraphRAG(
+        llm_model=llm,
+        cache_size=1024 if args.cache else 0,
+        embedding_model=embedding_model,
+        vector_store=vector_store,
+    )
+    rag.graph_backend.fanout = args.neighbor_fanout or None
+    rag.graph_backend.priority = args.neighbor_priority
+    return rag
+
+
+def run_scale(args, triplets: List[Triplet], items: List[Tuple[str, Optional[str]]], scale: int) -> Dict[str, object]:
+    rag = _build_rag(args)
+
+    vector_seconds = 0.0
+    if args.embeddings == "stub":
+        # Chỉ nhúng tên thật (bản sao 0): câu hỏi chỉ nhắc tới các tên này
+        start = time.perf_counter()
+        names = list(dict.fromkeys(name for src, des, _ in triplets for name in (src, des)))
+        rag.vector_store.add_texts(names)
+        rag.vector_version += 1
+        vector_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    subjects, objects, relations = zip(*synthetic_triplets(triplets, scale, seed=args.seed))
+    load_seconds = time.perf_counter() - start
+
+    # Nạp theo cột như init: chỉ mục CSR dựng thẳng, không chèn từng cạnh vào NetworkX
+    start = time.perf_counter()
+    rag.add_triplets(subjects, objects, relations)
+    index = rag.index
+    index_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rag.build_gazetteer()
+    rag.build_anchor_resolver()
+    lookup_seconds = time.perf_counter() - start
+
+    questions = [question for question, _ in items]
+    stage_times: Dict[str, List[float]] = {}
+    counts: Dict[str, List[int]] = {}
+    totals: List[float] = []
+    query_params = dict(
+        depth=args.depth,
+        max_hops=args.max_hops,
+        top_k_paths=args.top_k_paths,
+        neighbor_top_k=args.neighbor_top_k,
+        neighbor_candidate_multiplier=args.neighbor_candidate_multiplier,
+    )
+
+    start = time.perf_counter()
+    for question in questions:
+        trace = QueryTrace()
+        rag.query(question, trace=trace, **query_params)
+        trace.finish()
+        totals.append(trace.total)
+        for stage, seconds in trace.timings.items():
+            stage_times.setdefault(stage, []).append(seconds)
+        for item, value in trace.counts.items():
+            counts.setdefault(item, []).append(value)
+    wall_seconds = time.perf_counter() - start
+
+    # Recall của bước lấy lân cận (trước rerank): cấu hình đang chạy so với toàn bộ lân cận không giới hạn
+    answered = [(question, answer) for question, answer in items if answer is not None]
+    candidate_limit = max(args.neighbor_top_k * args.neighbor_candidate_multiplier, args.neighbor_top_k)
+    coverage = {
+        "configured": neighbor_coverage(rag, answered, args.depth, candidate_limit, rag.graph_backend.fanout),
+        "uncapped": neighbor_coverage(rag, answered, args.depth, None, None),
+    }
+
+    return {
+        "scale": scale,
+        "nodes": index.num_nodes,
+        "edges": index.num_edges,
+        "questions": len(questions),
+        "load_seconds": round(load_seconds, 3),
+        "index_seconds": round(index_seconds, 3),
+        "lookup_build_seconds": round(lookup_seconds, 3),
+        "vector_index_seconds": round(vector_seconds, 3),
+        "throughput_qps": round(len(questions) / wall_seconds, 2) if wall_seconds else None,
+        "total": _percentiles(totals),
+        "stages": {stage: _percentiles(values) for stage, values in stage_times.items()},
+        "counts_mean": {item: round(float(np.mean(values)), 2) for item, values in counts.items()},
+        "neighbor_coverage": coverage,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def main() -> None:
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark SmartGraphRAG retrieval stages and end-to-end latency over the project question sets."
+    )
+    parser.add_argument("--edges", default="data/final/edges.csv", help="Edges CSV (src, des, type).")
+    parser.add_argument("--questions-file", default="all_questions.csv", help="CSV of questions.")
+    parser.add_argument("--limit", type=int, default=None, help="Only run the first N questions.")
+    parser.add_argument(
+        "--scales",
+        type=int,
+        nargs="+",
+        default=[1, 10, 100],
+        help="Graph sizes to run, as multiples of the real graph (synthetic copies).",
+    )
+    parser.add_argument("--llm", choices=["stub", "local"], default="stub", help="Stub LLM or local Qwen2.5-0.5B.")
+    parser.add_argument(
+        "--embeddings",
+        choices=["stub", "hf"],
+        default="stub",
+        help="Deterministic fake embeddings + in-memory store, or the real bi-encoder + Chroma.",
+    )
+    parser.add_argument("--cache", action="store_true", help="Keep the query cache on (off by default).")
+    parser.add_argument("--depth", type=int, default=1, help="Neighborhood expansion depth.")
+    parser.add_argument("--max-hops", type=int, default=3, help="Max hops for multi-hop paths.")
+    parser.add_argument("--top-k-paths", type=int, default=2, help="Number of reranked paths to keep.")
+    parser.add_argument("--neighbor-top-k", type=int, default=4, help="Nearest edges kept after reranking.")
+    parser.add_argument(
+        "--neighbor-candidate-multiplier", type=int, default=3,
+        help="Neighbor candidates collected per kept edge before reranking.",
+    )
+    parser.add_argument(
+        "--neighbor-fanout", type=int, default=16,
+        help="Out-edges expanded per node when collecting neighbors (0 = no cap).",
+    )
+    parser.add_argument(
+        "--neighbor-priority", choices=["inverse_degree", "pagerank", "none"], default="inverse_degree",
+        help="Edge priority used to pick neighbors before the candidate budget is reached.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed for synthetic graph rewiring.")
+    parser.add_argument("--output-json", default="benchmark_results.json", help="Where to write the results.")
+    args = parser.parse_args()
+
+    # Cùng loader với server (init_graph): cùng kiểu cột, cùng cách bỏ dòng thiếu
+    triplets = GraphData.load(args.edges).edge_tuples()
+    items = list(_iter_questions(args.questions_file))
+    if args.limit is not None:
+        items = items[:args.limit]
+
+    results = []
+    for scale in sorted(args.scales):
+        print(f"Scale x{scale}: {len(triplets) * scale} edges, {len(items)} questions", file=sys.stderr)
+        result = run_scale(args, triplets, items, scale)
+        results.append(result)
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "results": results,
+    }
+    with open(args.output_json, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Saved benchmark results to {args.output_json}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,18 @@
+import argparse
+
+from src.GraphBuilder.utils.graph_data import GraphData
 from src.graph_rag import SmartGraphRAG
+from src.init_graph import init
 from langchain_google_genai import ChatGoogleGenerativeAI
-import pandas as pd
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index graph nodes into Chroma and precompute edge embeddings.")
+    parser.add_argument("--edges", default="data/final/edges.csv", help="Edges CSV (src, des, type).")
+    parser.add_argument("--nodes", default="data/final/nodes.csv", help="Nodes CSV (link, name, type).")
+    parser.add_argument("--batch-size", type=int, default=256, help="Texts per encoder batch / Chroma write.")
+    parser.add_argument("--skip-edges", action="store_true", help="Only index nodes, skip edge embeddings.")
+    args = parser.parse_args()
 
     llm = ChatGoogleGenerativeAI(
         model="gemini-2.5-flash", 
@@ -12,10 +21,14 @@ if __name__ == "__main__":
     )
 
     rag = SmartGraphRAG(llm_model=llm)
-    # df = pd.read_csv("/Users/huynhnguyen/WorkDir/Network/data/final/edges.csv")
-    # for i, row in df.iterrows():
-    #     rag.build_vector(row["src"], row["des"], row["type"])
-    # print(rag.query("Aage Bohr có những giải thưởng gì?"))
-    for item in rag.vector_store.similarity_search_with_score("Obama", k=10):
-        print(item)
 
+    # Đọc CSV một lần, dùng chung cho cả bước index node lẫn dựng đồ thị
+    data = GraphData.load(args.edges, args.nodes)
+    names = data.node_names()
+    added = rag.index_nodes(names, batch_size=args.batch_size)
+    print(f"Indexed {added} new nodes ({len(names) - added} already present)")
+
+    if not args.skip_edges:
+        # Embedding của chuỗi cạnh lân cận, dùng lại khi rerank thay vì encode mỗi query
+        init(rag, edges_path=args.edges, data=data)
+        rag.build_edge_embeddings(batch_size=args.batch_size)
@@ -1,24 +1,24 @@
 import argparse
+import asyncio
+import itertools
 import json
 import sys
-from typing import Iterable, List, Tuple
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
 
+import httpx
+import numpy as np
 import pandas as pd
 import requests
 from dotenv import load_dotenv
 
 
-def _iter_questions(csv_path: str) -> Iterable[str]:
+def _iter_questions(csv_path: str, limit: Optional[int] = None) -> Iterable[str]:
     df = pd.read_csv(csv_path, encoding="utf-8-sig")
     question_col = "Question" if "Question" in df.columns else df.columns[0]
-    cnt = 0
-    for value in df[question_col].dropna().astype(str):
-        if cnt > 100: 
-            break
-        question = value.strip()
-        if question:
-            yield question
-        cnt += 1
+    questions = (value.strip() for value in df[question_col].dropna().astype(str))
+    yield from itertools.islice((q for q in questions if q), limit)
 
 
 def _ask_server(session: requests.Session, base_url: str, question: str, timeout: int) -> Tuple[bool, str]:
@@ -42,6 +42,86 @@ def _ask_server(session: requests.Session, base_url: str, question: str, timeout
     return True, str(answer)
 
 
+async def _timed_request(client: httpx.AsyncClient, url: str, question: str, scheduled: float) -> Dict[str, object]:
+    # Đo từ thời điểm lẽ ra phải gửi (open loop) để không che mất thời gian xếp hàng phía client
+    record: Dict[str, object] = {"question": question, "ok": False, "status": None, "error": None}
+    try:
+        resp = await client.post(url, json={"message": question})
+        record["status"] = resp.status_code
+        if resp.status_code != 200:
+            record["error"] = f"http_{resp.status_code}"
+        elif "response" not in resp.json():
+            record["error"] = "missing_response_field"
+        else:
+            record["ok"] = True
+    except httpx.TimeoutException:
+        record["error"] = "timeout"
+    except (httpx.HTTPError, ValueError) as exc:
+        record["error"] = type(exc).__name__
+    record["latency_ms"] = round((time.perf_counter() - scheduled) * 1000, 3)
+    return record
+
+
+async def _run_load(
+    base_url: str,
+    questions: List[str],
+    total: int,
+    concurrency: int,
+    rate: float,
+    timeout: float,
+) -> Tuple[List[Dict[str, object]], float]:
+    """
+    Send ``total`` POST /api/chat requests, cycling through ``questions``.
+
+    Closed loop (``rate <= 0``): ``concurrency`` clients each send their next
+    request as soon as the previous one returns. Open loop (``rate > 0``):
+    requests start on a fixed ``1 / rate`` schedule whether or not earlier
+    ones finished, with at most ``concurrency`` connections open.
+    """
+    url = base_url.rstrip("/") + "/api/chat"
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    timeouts = httpx.Timeout(timeout, pool=None)
+    workload = itertools.islice(itertools.cycle(questions), total)
+    records: List[Dict[str, object]] = []
+
+    async with httpx.AsyncClient(limits=limits, timeout=timeouts) as client:
+        started = time.perf_counter()
+        if rate > 0:
+            tasks = []
+            for i, question in enumerate(workload):
+                scheduled = started + i / rate
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(_timed_request(client, url, question, scheduled)))
+            records = list(await asyncio.gather(*tasks))
+        else:
+            async def worker():
+                for question in workload:
+                    records.append(await _timed_request(client, url, question, time.perf_counter()))
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return records, elapsed
+
+
+def _print_report(records: List[Dict[str, object]], elapsed: float, concurrency: int, rate: float) -> None:
+    ok = [r["latency_ms"] for r in records if r["ok"]]
+    errors = Counter(r["error"] for r in records if not r["ok"])
+    mode = f"open loop @ {rate:g} req/s" if rate > 0 else "closed loop"
+    print(f"Mode: {mode}, concurrency {concurrency}")
+    print(f"Requests: {len(records)} in {elapsed:.2f}s ({len(records) / elapsed:.2f} req/s sent)")
+    print(f"Succeeded: {len(ok)} ({len(ok) / elapsed:.2f} req/s goodput)")
+    for error, count in errors.most_common():
+        print(f"Failed [{error}]: {count}")
+    if ok:
+        latencies = np.asarray(ok)
+        summary = ", ".join(
+            f"p{q}={np.percentile(latencies, q):.0f}" for q in (50, 90, 95, 99)
+        )
+        print(f"Latency ms (ok): {summary}, mean={latencies.mean():.0f}, max={latencies.max():.0f}")
+
+
 def main() -> None:
     load_dotenv()
 
@@ -64,22 +144,76 @@ def main() -> None:
         default=60,
         help="Request timeout in seconds.",
     )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=None,
+        help="Only use the first N questions of --questions-file.",
+    )
+    parser.add_argument(
+        "--load-test",
+        action="store_true",
+        help="Drive /api/chat with concurrent async clients and print a latency/throughput report.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Load test: concurrent clients (closed loop) or max open connections (open loop).",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=0.0,
+        help="Load test: target requests/second for an open-loop run (0 = closed loop).",
+    )
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=None,
+        help="Load test: total requests to send, cycling the questions (default: one per question).",
+    )
     parser.add_argument(
         "--output-json",
         default="smart_graph_server_results.json",
         help="Path to save Q&A JSON (list of {question, answer, ok}).",
     )
+    parser.add_argument(
+        "--load-output-json",
+        default="smart_graph_load_results.json",
+        help="Load test: path to save per-request records (question, ok, status, error, latency_ms).",
+    )
     args = parser.parse_args()
 
     if not args.question and not args.questions_file:
         parser.error("Provide --question or --questions-file.")
 
+    if args.load_test:
+        questions = list(_iter_questions(args.questions_file, args.limit)) if args.questions_file else []
+        if args.question:
+            questions.append(args.question)
+        records, elapsed = asyncio.run(
+            _run_load(
+                args.server_url,
+                questions,
+                total=args.requests or len(questions),
+                concurrency=args.concurrency,
+                rate=args.rate,
+                timeout=args.timeout,
+            )
+        )
+        _print_report(records, elapsed, args.concurrency, args.rate)
+        with open(args.load_output_json, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+        print(f"Saved {len(records)} request records to {args.load_output_json}")
+        return
+
     session = requests.Session()
 
     results: List[dict] = []
 
     if args.questions_file:
-        for question in _iter_questions(args.questions_file):
+        for question in _iter_questions(args.questions_file, args.limit):
             ok, answer = _ask_server(session, args.server_url, question, args.timeout)
             results.append({"question": question, "answer": answer, "ok": ok})
             print(f"Q: {question}\nA: {answer}\n")
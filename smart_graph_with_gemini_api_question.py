@@ -8,6 +8,7 @@ import pandas as pd
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 
+from src.batch_runner import checkpoint_path_for, run_batch
 from src.graph_rag import SmartGraphRAG
 from src.init_graph import init
 
@@ -101,6 +102,23 @@ def main() -> None:
         default=3,
         help="Oversampling multiplier before path rerank.",
     )
+    parser.add_argument(
+        "--checkpoint",
+        help="JSONL file results are appended to as they complete; reruns resume from it "
+        "(default: --output-json with a .jsonl suffix).",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Questions answered in parallel.",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=0.0,
+        help="Max questions started per second (0 = unlimited).",
+    )
     args = parser.parse_args()
 
     if not args.question and not args.questions_file:
@@ -122,10 +140,16 @@ def main() -> None:
 
     results = []
     if args.questions_file:
-        for question in _iter_questions(args.questions_file):
-            answer = _ask(rag, question, args)
-            results.append({"question": question, "answer": answer})
-            print(f"Q: {question}\nA: {answer}\n")
+        questions = list(_iter_questions(args.questions_file))
+        records = run_batch(
+            questions,
+            lambda question: _ask(rag, question, args),
+            checkpoint_path=args.checkpoint or checkpoint_path_for(args.output_json),
+            concurrency=args.concurrency,
+            rate=args.rate,
+            on_result=lambda record: print(f"Q: {record['question']}\nA: {record['answer']}\n"),
+        )
+        results.extend({"question": r["question"], "answer": r["answer"]} for r in records)
     if args.question:
         answer = _ask(rag, args.question, args)
         results.append({"question": args.question, "answer": answer})
@@ -1,17 +1,28 @@
 
-from typing import Dict, List, Tuple, Any, Set
+from typing import Dict, List, Optional, Tuple, Any, Set
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
 import requests
 from bs4 import BeautifulSoup
+from GraphBuilder.crawl.fetcher import AsyncFetcher
+from GraphBuilder.crawl.infobox import PageInfo, extract_page
+from GraphBuilder.crawl.sink import CrawlSink
 from GraphBuilder.utils.custom_queue import CustomQueue
 from GraphBuilder.utils.custom_set import CustomSet
 from collections import defaultdict
-from GraphBuilder.utils.utils import get_infobox, get_name
 
 
+BASE_URL = "https://vi.wikipedia.org"
+
 my_headers = {
     'User-Agent': 'ScienceNetworkBot/1.0 (mailto:hnc203204@gmail.com)'
 }
 
+# Dùng chung kết nối keep-alive cho mọi request đồng bộ
+session = requests.Session()
+session.headers.update(my_headers)
+
 def characterize_type_by_edge(labels: Set[str]) -> str:
     """
     Heuristically classify an entity type using its infobox edge labels.
@@ -101,44 +112,26 @@ def isPerson(link) -> bool:
     
     print(link)
     try:
-        page = requests.get(
-            f"https://vi.wikipedia.org{link}",
-            headers=my_headers,
-            timeout=10,
-        )
+        page = session.get(f"{BASE_URL}{link}", timeout=10)
         page.raise_for_status()
     except requests.RequestException as exc:
         print(f"Failed to fetch {link}: {exc}")
         return False
 
-    soup = BeautifulSoup(page.content, "html.parser")
-
-    name = get_name(soup)
-    if not name:
+    page_info = extract_page(page.content, with_categories=True)
+    if page_info is None:
         return False
 
-    node_labels: Set[str] = set()
-    ent_type = "UNKNOWN"
-
-    if (info := get_infobox(soup)):
-        for th in info.select("tr > th.infobox-label"):
-            label_text = th.get_text(strip=True)
-            if label_text:
-                node_labels.add(label_text)
-
-        ent_type = characterize_type_by_edge(node_labels)
+    if page_info.labels:
+        ent_type = characterize_type_by_edge(set(page_info.labels))
         if ent_type == "PERSON":
             return True
         if ent_type in {"ORGANIZATION", "PLACE"}:
             return False
 
     # Fallback: use category section heuristics when infobox data is missing/inconclusive.
-    category_block = soup.find("div", id="mw-normal-catlinks")
-    if category_block:
-        categories = [
-            a.get_text(strip=True).lower()
-            for a in category_block.select("li > a")
-        ]
+    categories = [cat.lower() for cat in page_info.categories]
+    if categories:
         person_markers = {"nhà ", "người", "sinh", "births", "nhân vật"}
         non_person_markers = {"công ty", "thành phố", "quốc gia", "tỉnh", "tác phẩm"}
 
@@ -179,10 +172,15 @@ labels = [
 
 class ExtractWiki:
     
-    edges: Set[Tuple[str, str, str]] = set()
-    nodes: Dict[str, Dict[str, str]] = {}
-    q: CustomQueue = CustomQueue()
-    visited: CustomSet = CustomSet()
+    sink: CrawlSink
+    q: CustomQueue
+    visited: CustomSet
+
+    def __init__(self, out_dir: str = "crawl_out"):
+        # Node/cạnh được ghi dần ra JSONL thay vì giữ hết trong bộ nhớ
+        self.sink = CrawlSink(out_dir)
+        self.q = CustomQueue()
+        self.visited = CustomSet()
         
     def traversal(self, seeds):
         
@@ -194,7 +192,7 @@ class ExtractWiki:
         # visited: Dict[str, bool] = defaultdict(lambda: False)
 
         
-        while (not self.q.isEmpty()) or len(self.nodes.keys()) <= 2000:
+        while (not self.q.isEmpty()) or self.sink.new_nodes <= 2000:
             link = self.q.dequeue()
             # print(link)
             self.visited.add(link)
@@ -209,86 +207,113 @@ class ExtractWiki:
                 if not self.visited.exist(new_link):
                     self.q.enqueue(new_link)
     
+    async def atraversal(
+        self,
+        seeds,
+        max_nodes: int = 2000,
+        concurrency: int = 16,
+        rate: float = 5.0,
+        max_retries: int = 3,
+        parse_workers: int = 0,
+    ):
+        """
+        Same BFS as ``traversal`` but with up to ``concurrency`` pages in
+        flight through one pooled ``AsyncFetcher`` (``rate`` requests/second
+        per host, retry with backoff). With ``parse_workers`` > 0 the HTML
+        is parsed in a process pool of that size instead of on the event
+        loop. Stops once ``max_nodes`` new pages are parsed in this run (not
+        counting nodes already in the sink from earlier runs) or the frontier
+        is exhausted.
+        """
+        for link in seeds:
+            self.q.enqueue(link)
+
+        in_flight = 0
+        wake = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        parse_pool = ProcessPoolExecutor(parse_workers) if parse_workers > 0 else None
+        link_labels = frozenset(labels)
+
+        async def worker(fetcher: AsyncFetcher):
+            nonlocal in_flight
+            # Chỉ đếm node của lần chạy này: crawl tiếp tục từ journal không dừng ngay vì node cũ
+            while self.sink.new_nodes < max_nodes:
+                if self.q.isEmpty():
+                    if in_flight == 0:
+                        return
+                    # Chờ một worker khác đưa thêm link vào hàng đợi
+                    wake.clear()
+                    await wake.wait()
+                    continue
+                link = self.q.dequeue()
+                if self.visited.exist(link):
+                    continue
+                self.visited.add(link)
+
+                in_flight += 1
+                try:
+                    content = await fetcher.get(link)
+                    page_info = None
+                    if content is not None:
+                        if parse_pool is not None:
+                            page_info = await loop.run_in_executor(parse_pool, extract_page, content, link_labels)
+                        else:
+                            page_info = extract_page(content, link_labels)
+                    links = self.record(link, page_info)
+                except Exception as e:
+                    print(e)
+                    links = []
+                finally:
+                    in_flight -= 1
+
+                for new_link in links:
+                    if not self.visited.exist(new_link):
+                        self.q.enqueue(new_link)
+                wake.set()
+            wake.set()
+
+        try:
+            async with AsyncFetcher(
+                BASE_URL, headers=my_headers, concurrency=concurrency, rate=rate, max_retries=max_retries
+            ) as fetcher:
+                await asyncio.gather(*(worker(fetcher) for _ in range(concurrency)))
+        finally:
+            if parse_pool is not None:
+                parse_pool.shutdown()
+
+    def fetch(self, link) -> bytes:
+        page = session.get(f"{BASE_URL}{link}", timeout=10)
+        return page.content
+
     def processed(self, link) -> List[str]:
-        page = requests.get(f"https://vi.wikipedia.org{link}", headers=my_headers)
+        return self.parse(link, self.fetch(link))
 
-        soup = BeautifulSoup(page.content, "html.parser")
+    def parse(self, link, content: bytes) -> List[str]:
+        """Record the node and its labelled infobox edges for ``link``; returns the linked hrefs."""
+        return self.record(link, extract_page(content, labels))
 
-        name = get_name(soup)
-        if not name:
+    def record(self, link, page_info: Optional[PageInfo]) -> List[str]:
+        if page_info is None:
             return []
 
-        
+        print(link, page_info.name)
         all_link: List[str] = []
+        for label_text, href in page_info.links:
+            print(f"\t Edges({link}, {href}, {label_text})")
+            self.sink.add_edge(link, href, label_text)
+            all_link.append(href)
 
-        
-        node_labels: Set[str] = set()
-        print(link, name)
-        if (info := get_infobox(soup)):
-            # print("1")
-            for tr in info.find_all("tr"):
-                if (edge := tr.find("th", class_ = "infobox-label")):
-                    label_text = edge.get_text(strip=True) if edge else None
-                    if label_text:
-                        node_labels.add(label_text)
-                    print(label_text)
-                    if not (label_text in labels):
-                        continue
-                    for a_ele in tr.find_all("a"):
-                        if a_ele.string:
-                            if (href := a_ele.get("href")):
-                                print(f"\t Edges({link}, {href}, {label_text})")
-                                self.edges.add((link, href, label_text))
-                                # self.edges_types.add(label_text)
-                                all_link.append(href)
-
-        ent_type = characterize_type_by_edge(node_labels)
-        self.nodes[link] = {
-            "name": name,
-            "type": ent_type
-        }
+        ent_type = characterize_type_by_edge(set(page_info.labels))
+        self.sink.add_node(link, page_info.name, ent_type)
         return all_link
     
-    def serialize(self):
-        import pandas as pd
-        new_edges = pd.DataFrame({
-            "src" : [t[0] for t in self.edges],
-            "des" : [t[1] for t in self.edges],
-            "type": [t[2] for t in self.edges]
-        })
-        
-        try:
-            edges_existing = pd.read_csv("edges.csv")
-        except Exception as e:
-            print(e)
-            edges_existing = pd.DataFrame({
-                "src" : [],
-                "des" : [],
-                "type": []
-            })
-        combined = pd.concat([edges_existing, new_edges], ignore_index=True)
-        combined.to_csv("edges.csv", index=False)
-        
-        new_nodes = pd.DataFrame({
-            "link" : [item for item in self.nodes.keys()],
-            "name" : [item["name"] for item in self.nodes.values()],
-            "type" : [item["type"] for item in self.nodes.values()]
-        })
-        
-        try:
-            nodes_existing = pd.read_csv("nodes.csv")
-        except Exception as e:
-            print(e)
-            nodes_existing = pd.DataFrame({
-                "link" : [],
-                "name" : [],
-                "type" : []
-            })
-        node_combined = pd.concat([nodes_existing, new_nodes], ignore_index=True)
-        node_combined.to_csv("nodes.csv", index=False)
+    def serialize(self, edges_out: str = "edges.csv", nodes_out: str = "nodes.csv"):
+        """Compact the crawl output into ``edges_out``/``nodes_out``, deduplicated."""
+        self.sink.compact(edges_out, nodes_out)
         
         
     def save(self):
+        self.sink.flush()
         self.q.serialize()
         self.visited.serialize()
         
@@ -314,7 +339,7 @@ class ExtractWiki:
 
 
 def get_all_href(link) -> List[str]:
-    page = requests.get(f"https://vi.wikipedia.org{link}", headers=my_headers)
+    page = session.get(f"{BASE_URL}{link}", timeout=10)
 
     soup = BeautifulSoup(page.content, "html.parser")
     wiki_tables = soup.find_all("table", class_ = "wikitable")
@@ -327,6 +352,18 @@ def get_all_href(link) -> List[str]:
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Crawl Vietnamese Wikipedia infobox graph.")
+    parser.add_argument("--async-crawl", action="store_true", help="Fetch pages concurrently with asyncio.")
+    parser.add_argument("--max-nodes", type=int, default=2000, help="Stop after this many new pages parsed in this run (async mode).")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent fetches (async mode).")
+    parser.add_argument("--rate", type=float, default=5.0, help="Requests per second per host (async mode).")
+    parser.add_argument("--max-retries", type=int, default=3, help="Retries per page (async mode).")
+    parser.add_argument(
+        "--parse-workers", type=int, default=os.cpu_count() or 1, help="Parser processes (async mode, 0 = in-process)."
+    )
+    args = parser.parse_args()
     
     seeds = [
         "/wiki/Danh_s%C3%A1ch_ng%C6%B0%E1%BB%9Di_%C4%91o%E1%BA%A1t_gi%E1%BA%A3i_Nobel"
@@ -338,7 +375,17 @@ if __name__ == "__main__":
     # for link in seeds:
     #     print(link)
     try:
-        extracter.traversal(seeds)
+        if args.async_crawl:
+            asyncio.run(extracter.atraversal(
+                seeds,
+                max_nodes=args.max_nodes,
+                concurrency=args.concurrency,
+                rate=args.rate,
+                max_retries=args.max_retries,
+                parse_workers=args.parse_workers,
+            ))
+        else:
+            extracter.traversal(seeds)
     except Exception as e:
         print(e)
         extracter.save()
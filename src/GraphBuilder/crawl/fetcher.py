@@ -0,0 +1,103 @@
+import asyncio
+import random
+import time
+from typing import Dict, Optional
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HostRateLimiter:
+    """Spaces requests to the same host at least ``1 / rate`` seconds apart."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, host: str):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, 0.0))
+            self._next[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def push_back(self, host: str, delay: float):
+        # Server bảo chậm lại (429 / Retry-After): lùi lịch của cả host
+        async with self._lock:
+            self._next[host] = max(self._next.get(host, 0.0), time.monotonic() + delay)
+
+
+class AsyncFetcher:
+    """
+    Pooled ``httpx.AsyncClient`` for crawling: at most ``concurrency``
+    requests in flight, ``rate`` requests/second per host, and up to
+    ``max_retries`` retries with exponential backoff (honouring
+    ``Retry-After``) on timeouts, connection errors, 429 and 5xx.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        headers: Optional[Dict[str, str]] = None,
+        concurrency: int = 16,
+        rate: float = 5.0,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        timeout: float = 10.0,
+    ):
+        self.base_url = base_url
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.limiter = HostRateLimiter(rate)
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.client = httpx.AsyncClient(
+            headers=headers,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+
+    async def __aenter__(self) -> "AsyncFetcher":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.aclose()
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * (2 ** attempt) * (1 + random.random())
+
+    async def get(self, link: str) -> Optional[bytes]:
+        """Page body for ``link`` (relative to ``base_url``), or ``None`` if it could not be fetched."""
+        url = urljoin(self.base_url, link)
+        host = urlsplit(url).netloc
+        for attempt in range(self.max_retries + 1):
+            response = None
+            await self.limiter.wait(host)
+            try:
+                async with self.semaphore:
+                    response = await self.client.get(url)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response.content
+            except httpx.HTTPStatusError as exc:
+                print(f"Failed to fetch {link}: {exc}")
+                return None
+            except (httpx.TimeoutException, httpx.TransportError) as exc:
+                print(f"Retry {attempt + 1}/{self.max_retries} {link}: {exc!r}")
+            if attempt == self.max_retries:
+                break
+            delay = self._delay(attempt, response)
+            if response is not None and response.status_code == 429:
+                await self.limiter.push_back(host, delay)
+            await asyncio.sleep(delay)
+        print(f"Giving up on {link}")
+        return None
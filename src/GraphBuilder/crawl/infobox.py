@@ -0,0 +1,117 @@
+import re
+from typing import FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+try:
+    import lxml.html as lxml_html
+except ImportError:  # lxml là tuỳ chọn; thiếu thì dùng html.parser trên đúng vùng cần đọc
+    lxml_html = None
+
+_H1 = re.compile(rb"<h1\b[^>]*>(.*?)</h1>", re.S | re.I)
+_INFOBOX = re.compile(rb"""<table\b[^>]*\bclass=["'](?:[^"']*\s)?infobox(?:\s[^"']*)?["']""", re.I)
+_TABLE_TAG = re.compile(rb"<(/?)table\b", re.I)
+_CATLINKS = re.compile(rb"""<div\b[^>]*\bid=["']mw-normal-catlinks["'][^>]*>(.*?)</div>""", re.S | re.I)
+
+
+class PageInfo(NamedTuple):
+    name: str
+    labels: List[str]
+    # (label, href) cho các dòng infobox có label nằm trong link_labels
+    links: List[Tuple[str, str]]
+    categories: List[str]
+
+
+def _table_region(content: bytes) -> Optional[bytes]:
+    """Bytes of the first infobox ``<table>`` including nested tables, without parsing the rest of the page."""
+    start = _INFOBOX.search(content)
+    if start is None:
+        return None
+    depth = 0
+    for tag in _TABLE_TAG.finditer(content, start.start()):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            end = content.find(b">", tag.end())
+            return content[start.start():end + 1]
+    return content[start.start():]
+
+
+def _rows_lxml(region: bytes, link_labels: FrozenSet[str]):
+    table = lxml_html.fragment_fromstring(region.decode("utf-8", "replace"))
+    for tr in table.iter("tr"):
+        th = next(
+            (el for el in tr.iter("th") if "infobox-label" in (el.get("class") or "").split()),
+            None,
+        )
+        if th is None:
+            continue
+        label = "".join(text.strip() for text in th.itertext())
+        hrefs = []
+        if label in link_labels:
+            hrefs = [a.get("href") for a in tr.iter("a") if a.get("href") and _single_string(a)]
+        yield label, hrefs
+
+
+def _single_string(el) -> bool:
+    # Đúng như a.string của BeautifulSoup: chỉ đi xuống khi thẻ có đúng một con và không có text nào khác,
+    # kể cả text toàn khoảng trắng (<a> <span>x</span></a> không có .string)
+    while len(el) == 1 and not el.text and not el[0].tail:
+        el = el[0]
+    return len(el) == 0 and bool(el.text)
+
+
+def _rows_bs4(region: bytes, link_labels: FrozenSet[str]):
+    from bs4 import BeautifulSoup
+
+    table = BeautifulSoup(region.decode("utf-8", "replace"), "html.parser")
+    for tr in table.find_all("tr"):
+        th = tr.find("th", class_="infobox-label")
+        if th is None:
+            continue
+        label = th.get_text(strip=True)
+        hrefs = []
+        if label in link_labels:
+            hrefs = [a.get("href") for a in tr.find_all("a") if a.string and a.get("href")]
+        yield label, hrefs
+
+
+def _text(fragment: bytes) -> str:
+    if lxml_html is not None:
+        return lxml_html.fragment_fromstring(fragment.decode("utf-8", "replace"), create_parent="div").text_content()
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(fragment.decode("utf-8", "replace"), "html.parser").get_text()
+
+
+def _categories(content: bytes) -> List[str]:
+    block = _CATLINKS.search(content)
+    if block is None:
+        return []
+    items = re.findall(rb"<li\b[^>]*>\s*<a\b[^>]*>(.*?)</a>", block.group(1), re.S | re.I)
+    return [_text(item).strip() for item in items]
+
+
+def extract_page(content: bytes, link_labels: Iterable[str] = (), with_categories: bool = False) -> Optional[PageInfo]:
+    """
+    Page name (``<h1>``), infobox labels and the links of rows whose label
+    is in ``link_labels``, in one pass over the infobox region only. Uses
+    lxml when installed, otherwise ``html.parser`` on the same region.
+    Returns ``None`` when the page has no title. Module level and
+    pickle-friendly, so it can run in a process pool.
+    """
+    h1 = _H1.search(content)
+    name = _text(h1.group(1)).strip() if h1 else ""
+    if not name:
+        return None
+
+    labels: List[str] = []
+    links: List[Tuple[str, str]] = []
+    region = _table_region(content)
+    if region is not None:
+        link_labels = frozenset(link_labels)
+        rows = _rows_lxml if lxml_html is not None else _rows_bs4
+        for label, hrefs in rows(region, link_labels):
+            if label:
+                labels.append(label)
+            links.extend((label, href) for href in hrefs)
+
+    categories = _categories(content) if with_categories else []
+    return PageInfo(name, labels, links, categories)
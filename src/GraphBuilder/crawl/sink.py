@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Set
+
+import pandas as pd
+
+from GraphBuilder.utils.graph_data import EDGE_COLUMNS, NODE_COLUMNS, read_table
+
+
+def _key(*parts: str) -> int:
+    # Khoá 8 byte thay vì tuple chuỗi để tập dedup gọn khi crawl hàng triệu cạnh
+    digest = hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class CrawlSink:
+    """
+    Append-only JSONL output of a crawl (``edges.jsonl``, ``nodes.jsonl``
+    under ``directory``). Records are buffered and appended every
+    ``flush_every`` items; edges are deduplicated by (src, des, type) and
+    nodes by link, across runs too, since reopening the sink rereads the
+    keys already on disk. ``num_nodes`` counts every node on disk,
+    ``new_nodes`` only those added since this sink was opened.
+    """
+
+    def __init__(self, directory: str = "crawl_out", flush_every: int = 1000):
+        self.directory = directory
+        self.flush_every = flush_every
+        self.edges_path = os.path.join(directory, "edges.jsonl")
+        self.nodes_path = os.path.join(directory, "nodes.jsonl")
+        self._edge_keys: Set[int] = set()
+        self._node_keys: Set[int] = set()
+        self._edges: List[Dict[str, str]] = []
+        self._nodes: List[Dict[str, str]] = []
+        self.new_nodes = 0
+
+        os.makedirs(directory, exist_ok=True)
+        for record in self._read(self.edges_path):
+            self._edge_keys.add(_key(*(record[c] for c in EDGE_COLUMNS)))
+        for record in self._read(self.nodes_path):
+            self._node_keys.add(_key(record["link"]))
+
+    @staticmethod
+    def _read(path: str):
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # dòng cuối bị cắt dở khi crawler dừng đột ngột
+                    continue
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self._node_keys)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self._edge_keys)
+
+    def add_edge(self, src: str, des: str, type: str) -> bool:
+        key = _key(src, des, type)
+        if key in self._edge_keys:
+            return False
+        self._edge_keys.add(key)
+        self._edges.append({"src": src, "des": des, "type": type})
+        if len(self._edges) >= self.flush_every:
+            self.flush()
+        return True
+
+    def add_node(self, link: str, name: str, type: str) -> bool:
+        key = _key(link)
+        if key in self._node_keys:
+            return False
+        self._node_keys.add(key)
+        self.new_nodes += 1
+        self._nodes.append({"link": link, "name": name, "type": type})
+        if len(self._nodes) >= self.flush_every:
+            self.flush()
+        return True
+
+    def flush(self):
+        for path, buffer in ((self.edges_path, self._edges), (self.nodes_path, self._nodes)):
+            if not buffer:
+                continue
+            with open(path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in buffer)
+                f.flush()
+                os.fsync(f.fileno())
+            buffer.clear()
+
+    def compact(self, edges_out: str = "edges.csv", nodes_out: str = "nodes.csv"):
+        """
+        Write the deduplicated crawl to ``edges_out``/``nodes_out`` (CSV, or
+        Parquet when the path ends in ``.parquet``), merged with any rows
+        already in those files.
+        """
+        self.flush()
+        compact_table(self.edges_path, edges_out, EDGE_COLUMNS, EDGE_COLUMNS)
+        compact_table(self.nodes_path, nodes_out, NODE_COLUMNS, ["link"])
+
+
+def compact_table(jsonl_path: str, out_path: str, columns: List[str], key: List[str]):
+    frames = []
+    if os.path.exists(out_path):
+        frames.append(read_table(out_path, columns, categorical=(), dropna=False))
+    if os.path.exists(jsonl_path):
+        frames.append(pd.DataFrame(list(CrawlSink._read(jsonl_path)), columns=columns))
+    if not frames:
+        return
+    table = pd.concat(frames, ignore_index=True).drop_duplicates(subset=key, keep="first")
+
+    tmp_path = out_path + ".tmp"
+    if out_path.endswith(".parquet"):
+        table.to_parquet(tmp_path, index=False)
+    else:
+        table.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, out_path)
+
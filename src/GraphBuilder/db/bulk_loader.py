@@ -0,0 +1,116 @@
+import uuid
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from GraphBuilder.db.models import (
+    ENTITY_TYPE_TO_CLASS,
+    PERSON_RELATIONSHIP_LABEL_TO_ATTRIBUTE,
+    PERSON_RELATIONSHIP_SCHEMAS,
+    db,
+)
+
+BATCH_SIZE = 5000
+
+
+def _node_query(labels: List[str]) -> str:
+    # Nhãn không truyền được qua tham số nên mỗi lớp có một câu truy vấn riêng;
+    # MERGE theo Entity.name (unique) để không vi phạm ràng buộc khi trùng tên khác lớp
+    extra = "".join(f":`{label}`" for label in labels if label != "Entity")
+    return (
+        "UNWIND $rows AS row "
+        "MERGE (n:Entity {name: row.name}) "
+        f"ON CREATE SET n{extra}, n.link = row.link, n.uid = row.uid"
+    )
+
+
+def _relationship_query(relationship_type: str) -> str:
+    return (
+        "UNWIND $rows AS row "
+        "MATCH (s:Entity {link: row.src}) "
+        "MATCH (d:Entity {link: row.dst}) "
+        f"MERGE (s)-[:`{relationship_type}`]->(d)"
+    )
+
+
+def _loadable(entity) -> bool:
+    return (
+        entity is not None
+        and entity["type"] in ENTITY_TYPE_TO_CLASS
+        and isinstance(entity["name"], str)
+        and bool(entity["name"])
+    )
+
+
+def group_rows(
+    edges: Iterable[Tuple[str, str, str]],
+    nodes: Dict[str, Dict[str, str]],
+) -> Tuple[Dict[str, List[Dict[str, str]]], Dict[str, List[Dict[str, str]]], int]:
+    """
+    Node rows grouped by entity type and relationship rows grouped by
+    relationship type, for the edges ``Graph.build`` can load: a known
+    relationship label and both endpoints in ``nodes`` with a mapped type.
+    Returns ``(node_rows, relationship_rows, skipped_edges)``.
+    """
+    node_rows: Dict[str, List[Dict[str, str]]] = defaultdict(list)
+    relationship_rows: Dict[str, List[Dict[str, str]]] = defaultdict(list)
+    seen_links = set()
+    skipped = 0
+
+    for src, dst, label in edges:
+        attribute = PERSON_RELATIONSHIP_LABEL_TO_ATTRIBUTE.get(label)
+        src_entity = nodes.get(src)
+        dst_entity = nodes.get(dst)
+        if attribute is None or not _loadable(src_entity) or not _loadable(dst_entity):
+            skipped += 1
+            continue
+
+        for link, entity in ((src, src_entity), (dst, dst_entity)):
+            if link not in seen_links:
+                seen_links.add(link)
+                node_rows[entity["type"]].append(
+                    {"name": entity["name"], "link": link, "uid": uuid.uuid4().hex}
+                )
+        relationship_type = PERSON_RELATIONSHIP_SCHEMAS[attribute]["relationship_type"]
+        relationship_rows[relationship_type].append({"src": src, "dst": dst})
+
+    return node_rows, relationship_rows, skipped
+
+
+def _run_batches(query: str, rows: List[Dict[str, str]], batch_size: int):
+    for start in range(0, len(rows), batch_size):
+        with db.transaction:
+            db.cypher_query(query, {"rows": rows[start:start + batch_size]})
+
+
+def install_schema():
+    """Create the Entity name/link unique constraints so the MERGE/MATCH lookups are index-backed."""
+    for entity_class in set(ENTITY_TYPE_TO_CLASS.values()):
+        db.install_labels(entity_class)
+
+
+def bulk_load(
+    edges: Iterable[Tuple[str, str, str]],
+    nodes: Dict[str, Dict[str, str]],
+    batch_size: int = BATCH_SIZE,
+    ensure_schema: bool = True,
+) -> Dict[str, int]:
+    """
+    Write nodes then relationships with ``UNWIND $rows MERGE`` batches of
+    ``batch_size`` rows, one explicit transaction per batch and one query
+    per entity class / relationship type.
+    """
+    if ensure_schema:
+        install_schema()
+
+    node_rows, relationship_rows, skipped = group_rows(edges, nodes)
+    for entity_type, rows in node_rows.items():
+        labels = ENTITY_TYPE_TO_CLASS[entity_type].inherited_labels()
+        _run_batches(_node_query(labels), rows, batch_size)
+    for relationship_type, rows in relationship_rows.items():
+        _run_batches(_relationship_query(relationship_type), rows, batch_size)
+
+    return {
+        "nodes": sum(len(rows) for rows in node_rows.values()),
+        "relationships": sum(len(rows) for rows in relationship_rows.values()),
+        "skipped_edges": skipped,
+    }
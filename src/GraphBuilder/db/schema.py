@@ -0,0 +1,110 @@
+from typing import Dict
+
+# Schema quan hệ của Person, tách khỏi models.py để import không cấu hình kết nối neomodel
+PERSON_RELATIONSHIP_SCHEMAS: Dict[str, Dict[str, object]] = {
+    "died": {
+        "label": "Mất",
+        "relationship_type": "MAT",
+        "targets": {"UNKNOWN", "PLACE", "COUNTRY", "PERSON", "ORGANIZATION"},
+    },
+    "schools": {
+        "label": "Trường lớp",
+        "relationship_type": "TRUONG_LOP",
+        "targets": {"UNIVERSITY", "PLACE", "ORGANIZATION", "UNKNOWN"},
+    },
+    "nationalities": {
+        "label": "Quốc tịch",
+        "relationship_type": "QUOC_TICH",
+        "targets": {"COUNTRY", "PLACE", "UNKNOWN", "PERSON", "ORGANIZATION"},
+    },
+    "notable_for": {
+        "label": "Nổi tiếng vì",
+        "relationship_type": "NOI_TIENG_VI",
+        "targets": {"ARTICLE", "PLACE", "ORGANIZATION", "UNKNOWN"},
+    },
+    "influenced": {
+        "label": "Ảnh hưởng tới",
+        "relationship_type": "ANH_HUONG_TOI",
+        "targets": {"FIELD", "PERSON", "UNKNOWN"},
+    },
+    "education": {
+        "label": "Giáo dục",
+        "relationship_type": "GIAO_DUC",
+        "targets": {"ORGANIZATION", "UNKNOWN"},
+    },
+    "birth_contexts": {
+        "label": "Sinh",
+        "relationship_type": "SINH",
+        "targets": {"UNKNOWN", "COUNTRY", "PLACE", "ORGANIZATION", "EVENT", "PERSON"},
+    },
+    "awards": {
+        "label": "Giải thưởng",
+        "relationship_type": "GIAI_THUONG",
+        "targets": {"AWARD", "PERSON", "PLACE", "ORGANIZATION", "EVENT", "UNKNOWN"},
+    },
+    "occupations": {
+        "label": "Nghề nghiệp",
+        "relationship_type": "NGHE_NGHIEP",
+        "targets": {"JOB", "PERSON", "ORGANIZATION", "UNKNOWN"},
+    },
+    "workplaces": {
+        "label": "Nơi công tác",
+        "relationship_type": "NOI_CONG_TAC",
+        "targets": {"PLACE", "ORGANIZATION", "UNKNOWN"},
+    },
+    "major_awards": {
+        "label": "Giải thưởng nổi bật",
+        "relationship_type": "GIAI_THUONG_NOI_BAT",
+        "targets": {"AWARD", "PLACE", "ORGANIZATION", "EVENT", "UNKNOWN"},
+    },
+    "influenced_by": {
+        "label": "Ảnh hưởng bởi",
+        "relationship_type": "ANH_HUONG_BOI",
+        "targets": {"UNKNOWN", "PERSON"},
+    },
+    "children": {
+        "label": "Con cái",
+        "relationship_type": "CON_CAI",
+        "targets": {"PERSON", "UNKNOWN"},
+    },
+    "degrees": {
+        "label": "Học vị",
+        "relationship_type": "HOC_VI",
+        "targets": {"ORGANIZATION", "UNKNOWN"},
+    },
+    "notable_doctoral_students": {
+        "label": "Các nghiên cứu sinh nổi tiếng",
+        "relationship_type": "CAC_NGHIEN_CUU_SINH_NOI_TIENG",
+        "targets": {"UNKNOWN", "PERSON"},
+    },
+    "marriages": {
+        "label": "Hôn nhân",
+        "relationship_type": "HON_NHAN",
+        "targets": {"PERSON"},
+    },
+    "doctoral_advisors": {
+        "label": "Người hướng dẫn luận án tiến sĩ",
+        "relationship_type": "NGUOI_HUONG_DAN_LUAN_AN_TIEN_SI",
+        "targets": {"UNKNOWN", "PERSON"},
+    },
+    "spouses": {
+        "label": "Phối ngẫu",
+        "relationship_type": "PHOI_NGAU",
+        "targets": {"UNKNOWN", "PERSON"},
+    },
+    "notable_students": {
+        "label": "Các sinh viên nổi tiếng",
+        "relationship_type": "CAC_SINH_VIEN_NOI_TIENG",
+        "targets": {"UNKNOWN", "PERSON"},
+    },
+    "theses": {
+        "label": "Luận án",
+        "relationship_type": "LUAN_AN",
+        "targets": {"UNKNOWN"},
+    },
+}
+
+
+PERSON_RELATIONSHIP_LABEL_TO_ATTRIBUTE: Dict[str, str] = {
+    schema["label"]: attr_name for attr_name, schema in PERSON_RELATIONSHIP_SCHEMAS.items()
+}
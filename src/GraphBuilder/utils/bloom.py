@@ -0,0 +1,51 @@
+import hashlib
+import math
+from typing import Iterable, Tuple
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings: ``False`` from ``__contains__`` is
+    definitive, ``True`` may be a false positive at about ``error_rate``
+    once ``capacity`` items have been added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing: h1 + i * h2 từ một digest blake2b 16 byte
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def save(self, path: str, tag: int = 0):
+        """Write the filter with an integer ``tag`` the owner can use to check it is still current."""
+        with open(path, "wb") as f:
+            f.write(tag.to_bytes(8, "little"))
+            f.write(self.capacity.to_bytes(8, "little"))
+            f.write(int(self.error_rate * 1e9).to_bytes(8, "little"))
+            f.write(self.bits)
+
+    @classmethod
+    def load(cls, path: str) -> Tuple[int, "BloomFilter"]:
+        with open(path, "rb") as f:
+            tag = int.from_bytes(f.read(8), "little")
+            capacity = int.from_bytes(f.read(8), "little")
+            error_rate = int.from_bytes(f.read(8), "little") / 1e9
+            obj = cls(capacity, error_rate)
+            obj.bits = bytearray(f.read())
+        return tag, obj
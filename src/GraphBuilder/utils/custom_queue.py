@@ -1,16 +1,39 @@
+import os
+from collections import deque
 
 
 class CustomQueue:
-  def __init__(self):
-    self.q = []
-    
+  """
+  FIFO crawl frontier on a deque (O(1) enqueue/dequeue). Every operation is
+  journaled to ``path`` as ``+<element>`` / ``-`` lines, appended in chunks
+  of ``checkpoint_every``, so ``unserialize`` can replay the frontier after
+  a crash. ``serialize`` compacts the journal to the current contents; a
+  checkpoint also compacts it once it holds more than ``compact_ratio``
+  times as many lines as the queue (at least ``checkpoint_every``), so the
+  journal stays bounded by the frontier size instead of growing with every
+  operation.
+  """
+
+  def __init__(self, path: str = "queue.log", checkpoint_every: int = 1000, compact_ratio: int = 4):
+    self.q = deque()
+    self.path = path
+    self.checkpoint_every = checkpoint_every
+    self.compact_ratio = compact_ratio
+    self._journal = []
+    # Số dòng đã ghi vào journal kể từ lần serialize gần nhất
+    self._logged = 0
+    # Hàng đợi mới (không nạp từ journal) ghi đè journal cũ ở lần checkpoint đầu tiên
+    self._fresh = True
+
   def enqueue(self, element):
     self.q.append(element)
+    self._log("+" + element)
 
   def dequeue(self):
     if self.isEmpty():
       return "Queue is empty"
-    return self.q.pop(0)
+    self._log("-")
+    return self.q.popleft()
 
   def peek(self):
     if self.isEmpty():
@@ -23,33 +46,53 @@ class CustomQueue:
   def size(self):
     return len(self.q)
 
+  def _log(self, entry: str):
+    self._journal.append(entry)
+    if len(self._journal) >= self.checkpoint_every:
+      self.checkpoint()
+
+  def checkpoint(self):
+    if self._fresh:
+      self.serialize()
+      return
+    if not self._journal:
+      return
+    if self._logged + len(self._journal) > self.compact_ratio * max(len(self.q), self.checkpoint_every):
+      self.serialize()
+      return
+    with open(self.path, "a", encoding="utf-8") as f:
+      f.writelines(entry + "\n" for entry in self._journal)
+    self._logged += len(self._journal)
+    self._journal.clear()
+
   def serialize(self):
-    import json
-    with open("queue.json", "w", encoding="utf-8") as f:
-      json.dump(self.q, f, indent=2, ensure_ascii=False)
-    
+    tmp_path = self.path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+      f.writelines("+" + element + "\n" for element in self.q)
+    os.replace(tmp_path, self.path)
+    self._logged = len(self.q)
+    self._journal.clear()
+    self._fresh = False
+
   @classmethod
-  def unserialize(cls, path):
-    import json 
-    
-    obj = cls()
-    
-    with open("queue.json", "r") as f:
-      obj.q = json.load(f)
-      
+  def unserialize(cls, path: str = "queue.log", **kwargs):
+    obj = cls(path, **kwargs)
+
+    if os.path.exists(path):
+      with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+          obj._logged += 1
+          line = line.rstrip("\n")
+          if line.startswith("+"):
+            obj.q.append(line[1:])
+          elif line == "-" and obj.q:
+            obj.q.popleft()
+    elif os.path.exists("queue.json"):
+      # queue.json kiểu cũ
+      import json
+      with open("queue.json", "r", encoding="utf-8") as f:
+        obj.q.extend(json.load(f))
+      obj.serialize()
+
+    obj._fresh = False
     return obj
-      
-      
-      
-  # if __name__ == "__main__":
-    # from GraphBuilder.utils.custom_queue import CustomQueue
-    # q: CustomQueue = CustomQueue()
-    
-    # q.enqueue("test")
-    # q.serialize("test.json")
-    
-    # q: CustomQueue = CustomQueue.unserialize("test.json")
-    
-    # print(q.peek())
-    
-    
\ No newline at end of file
@@ -1,34 +1,124 @@
-from typing import Set
+import os
+import sqlite3
+from typing import List, Optional, Set
+
+from GraphBuilder.utils.bloom import BloomFilter
+
 
 class CustomSet:
-    
-    s: Set[str] = set()
-    
+    """
+    Visited-URL set stored in SQLite, so memory stays bounded and a restart
+    only reopens the database. Adds are buffered and written in batches of
+    ``flush_every``; an optional Bloom filter (``bloom_capacity`` > 0)
+    answers most negative lookups without touching the database. An
+    existing database is reused (the queue journal relies on it when a crawl
+    resumes); pass ``reset=True`` to start from an empty set.
+    """
+
+    def __init__(
+        self,
+        path: str = "visited.sqlite",
+        bloom_capacity: int = 0,
+        error_rate: float = 0.01,
+        flush_every: int = 1000,
+        reset: bool = False,
+    ):
+        self.path = path
+        self.flush_every = flush_every
+        self.bloom: Optional[BloomFilter] = BloomFilter(bloom_capacity, error_rate) if bloom_capacity > 0 else None
+        self._pending: Set[str] = set()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._reset = reset
+        # Bloom mới tạo phải nạp lại các URL đã có trong DB (unserialize tự lo phần này)
+        self._fill_on_open = not reset
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Mở DB khi dùng lần đầu, để tạo CustomSet() không ghi gì ra đĩa
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS visited (url TEXT PRIMARY KEY) WITHOUT ROWID")
+            if self._reset:
+                with self._conn:
+                    self._conn.execute("DELETE FROM visited")
+                if os.path.exists(self.path + ".bloom"):
+                    os.remove(self.path + ".bloom")
+            elif self._fill_on_open and self.bloom is not None:
+                self._fill_bloom()
+        return self._conn
+
     def add(self, element: str):
-        self.s.add(element)
-        
+        if self.bloom is not None:
+            self.bloom.add(element)
+        self._pending.add(element)
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
     def exist(self, element) -> bool:
-        return element in self.s
-    
+        conn = self.conn
+        if self.bloom is not None and element not in self.bloom:
+            return False
+        if element in self._pending:
+            return True
+        return conn.execute("SELECT 1 FROM visited WHERE url = ?", (element,)).fetchone() is not None
+
+    def __contains__(self, element) -> bool:
+        return self.exist(element)
+
+    def __len__(self) -> int:
+        self.flush()
+        return self.conn.execute("SELECT COUNT(*) FROM visited").fetchone()[0]
+
+    def flush(self):
+        if not self._pending:
+            return
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO visited (url) VALUES (?)", ((e,) for e in self._pending))
+        self._pending.clear()
+
     def serialize(self):
-        import json 
-        
-        with open("set.json", "w", encoding="utf-8") as f:
-            json.dump(list(self.s), f, indent=2, ensure_ascii=False)
-            
+        self.flush()
+        if self.bloom is not None:
+            self.bloom.save(self.path + ".bloom", tag=len(self))
+
     @classmethod
-    def unserialize(cls):
-        import json 
-        obj = cls()
-        with open("set.json", "r") as f:
-            obj.s = set(json.load(f))
+    def unserialize(cls, path: str = "visited.sqlite", **kwargs):
+        obj = cls(path, **kwargs)
+        obj._fill_on_open = False
+        bloom_path = path + ".bloom"
+        if os.path.exists(bloom_path):
+            count, bloom = BloomFilter.load(bloom_path)
+            # Bloom lưu từ lần serialize trước chỉ dùng được nếu DB không thêm gì sau đó
+            if count == len(obj):
+                obj.bloom = bloom
+            else:
+                obj.bloom = BloomFilter(bloom.capacity, bloom.error_rate)
+                obj._fill_bloom()
+        elif obj.bloom is not None:
+            obj._fill_bloom()
+        if os.path.exists("set.json"):
+            obj._import_json("set.json")
         return obj
-            
+
+    def _fill_bloom(self):
+        for (url,) in self.conn.execute("SELECT url FROM visited"):
+            self.bloom.add(url)
+
+    def _import_json(self, json_path: str):
+        # Chuyển set.json kiểu cũ sang SQLite một lần
+        import json
+
+        with open(json_path, "r", encoding="utf-8") as f:
+            elements: List[str] = json.load(f)
+        for element in elements:
+            self.add(element)
+        self.serialize()
+        os.replace(json_path, json_path + ".migrated")
+
 
 if __name__ == "__main__":
     my_set: CustomSet = CustomSet.unserialize()
-    
-    print(my_set.s) 
-    
-        
-    
\ No newline at end of file
+
+    print(len(my_set))
@@ -0,0 +1,89 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+EDGE_COLUMNS = ["src", "des", "type"]
+NODE_COLUMNS = ["link", "name", "type"]
+
+
+def read_table(
+    path: str,
+    columns: Sequence[str],
+    categorical: Sequence[str] = ("type",),
+    dropna: bool = True,
+) -> pd.DataFrame:
+    """
+    Read ``columns`` of a CSV (or ``.parquet``) file as string columns, with
+    ``categorical`` ones as pandas categories. With ``dropna`` rows missing
+    any of the columns are dropped. Uses the pyarrow CSV engine when it is
+    installed.
+    """
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path, columns=list(columns))
+    else:
+        df = pd.read_csv(path, usecols=list(columns), dtype=str, engine=CSV_ENGINE)
+    df = df[list(columns)]
+    if dropna:
+        df = df.dropna()
+    for column in categorical:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    return df.reset_index(drop=True)
+
+
+class GraphData:
+    """
+    ``edges.csv`` (src, des, type) and optionally ``nodes.csv`` (link, name,
+    type) read once into typed frames, with the column-wise views each
+    consumer needs: tuples for the Neo4j builder, integer codes for
+    ``GraphIndex``, unique names for the embedding indexer.
+    """
+
+    def __init__(self, edges: pd.DataFrame, nodes: Optional[pd.DataFrame] = None):
+        self.edges = edges
+        self.nodes = nodes
+
+    @classmethod
+    def load(cls, edges_path: str, nodes_path: Optional[str] = None) -> "GraphData":
+        edges = read_table(edges_path, EDGE_COLUMNS)
+        nodes = read_table(nodes_path, NODE_COLUMNS) if nodes_path else None
+        return cls(edges, nodes)
+
+    def __len__(self) -> int:
+        return len(self.edges)
+
+    def columns(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """``(src, des, type)`` as numpy object arrays (no per-row Python objects are created)."""
+        return (
+            self.edges["src"].to_numpy(dtype=object),
+            self.edges["des"].to_numpy(dtype=object),
+            self.edges["type"].to_numpy(dtype=object),
+        )
+
+    def edge_tuples(self) -> List[Tuple[str, str, str]]:
+        return list(zip(*self.columns()))
+
+    def node_records(self) -> Dict[str, Dict[str, str]]:
+        """``{link: {"name": ..., "type": ...}}`` from ``nodes.csv``; later duplicates of a link win."""
+        if self.nodes is None:
+            return {}
+        links = self.nodes["link"].tolist()
+        names = self.nodes["name"].tolist()
+        types = self.nodes["type"].astype(str).tolist()
+        return {link: {"name": name, "type": typ} for link, name, typ in zip(links, names, types)}
+
+    def node_names(self) -> List[str]:
+        """Unique, stripped node names from edge endpoints and ``nodes.csv`` names, in first-seen order."""
+        parts = [self.edges["src"], self.edges["des"]]
+        if self.nodes is not None:
+            parts.append(self.nodes["name"])
+        names = pd.concat(parts, ignore_index=True).str.strip()
+        return names[names != ""].drop_duplicates().tolist()
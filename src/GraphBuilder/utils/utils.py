@@ -3,17 +3,9 @@ from typing import List, Dict
 from bs4 import BeautifulSoup
 
 def read_csv(path: str) -> List[Dict[str, str]]:
-    import pandas as pd
-    df = pd.read_csv(path)
-    data = [
-        {
-            "name": row[1]["name"],
-            "field": row[1]["field"],
-            "country": row[1]["country"]
-        }
-             for row in df.iterrows()
-    ]
-    return data
+    from GraphBuilder.utils.graph_data import read_table
+    df = read_table(path, ["name", "field", "country"], categorical=(), dropna=False)
+    return df.to_dict("records")
 
 def is_date(date: str) -> bool:
     import datetime
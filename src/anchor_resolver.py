@@ -0,0 +1,70 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set
+
+from src.text_norm import fold_name
+
+
+def trigrams(folded: str) -> Set[str]:
+    padded = f"  {folded} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class AnchorResolver:
+    """
+    Maps extracted entity strings to graph node names without the embedding
+    model: exact name, then accent-folded name (both O(1) hash lookups), then
+    character-trigram similarity for typos. Entities that none of these
+    resolve are left for the vector store.
+    """
+
+    def __init__(self, names: Iterable[str], min_similarity: float = 0.4):
+        self.min_similarity = min_similarity
+        self.names: Set[str] = set()
+        self.by_folded: Dict[str, List[str]] = defaultdict(list)
+        for name in names:
+            self.names.add(name)
+            folded = fold_name(name)
+            if folded:
+                self.by_folded[folded].append(name)
+
+        self.folded_keys = list(self.by_folded)
+        self.key_sizes: List[int] = []
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+        for key_id, folded in enumerate(self.folded_keys):
+            grams = trigrams(folded)
+            self.key_sizes.append(len(grams))
+            for gram in grams:
+                self.postings[gram].append(key_id)
+
+    def exact(self, entity: str) -> List[str]:
+        if entity in self.names:
+            return [entity]
+        return list(self.by_folded.get(fold_name(entity), []))
+
+    def fuzzy(self, entity: str, k: int) -> List[str]:
+        folded = fold_name(entity)
+        if not folded:
+            return []
+        grams = trigrams(folded)
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for key_id in self.postings.get(gram, ()):
+                shared[key_id] += 1
+
+        scored = []
+        for key_id, overlap in shared.items():
+            similarity = overlap / (len(grams) + self.key_sizes[key_id] - overlap)
+            if similarity >= self.min_similarity:
+                scored.append((similarity, key_id))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+
+        matches: List[str] = []
+        for _, key_id in scored:
+            for name in self.by_folded[self.folded_keys[key_id]]:
+                matches.append(name)
+                if len(matches) >= k:
+                    return matches
+        return matches
+
+    def resolve(self, entity: str, k: int) -> List[str]:
+        return self.exact(entity)[:k] or self.fuzzy(entity, k)
@@ -1,6 +1,11 @@
+import asyncio
+import json
+import os
+import threading
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -8,9 +13,22 @@ from dotenv import load_dotenv
 from src.graph_rag import SmartGraphRAG
 from src.init_graph import init
 from src.graph_rag import load_tiny_vietnamese_llm
+from src.inference_pool import InferencePool, PoolSaturated
+from src.metrics import QueryTrace, render_samples
 
 load_dotenv()
 
+# Số request chạy song song / số request được xếp hàng chờ; vượt quá thì trả 503 + Retry-After
+RAG_WORKERS = int(os.getenv("RAG_WORKERS", "2"))
+RAG_QUEUE_DEPTH = int(os.getenv("RAG_QUEUE_DEPTH", "8"))
+RAG_RETRY_AFTER = int(os.getenv("RAG_RETRY_AFTER", "5"))
+# Micro-batching sinh văn bản: số prompt tối đa mỗi batch và thời gian chờ gom batch (ms)
+RAG_MAX_BATCH = int(os.getenv("RAG_MAX_BATCH", str(RAG_WORKERS)))
+RAG_BATCH_WAIT_MS = float(os.getenv("RAG_BATCH_WAIT_MS", "10"))
+# Nơi đọc đồ thị khi truy vấn: "memory" (nạp edges.csv vào RAM) hoặc "neo4j" (truy vấn Neo4j qua driver pool)
+GRAPH_BACKEND = os.getenv("GRAPH_BACKEND", "memory")
+NEO4J_POOL_SIZE = int(os.getenv("NEO4J_POOL_SIZE", "50"))
+
 app = FastAPI(title="Mark-2 GraphRAG API")
 
 app.add_middleware(
@@ -23,6 +41,7 @@ app.add_middleware(
 
 
 rag_engine = None
+inference_pool = InferencePool(max_workers=RAG_WORKERS, max_queue=RAG_QUEUE_DEPTH)
 
 @app.on_event("startup")
 async def startup_event():
@@ -30,9 +49,14 @@ async def startup_event():
     print("Đang khởi động hệ thống GraphRAG...")
     
     try:
-        llm = load_tiny_vietnamese_llm()
+        llm = load_tiny_vietnamese_llm(max_batch_size=RAG_MAX_BATCH, max_wait_ms=RAG_BATCH_WAIT_MS)
         
-        rag_engine = SmartGraphRAG(llm_model=llm)
+        graph_backend = None
+        if GRAPH_BACKEND == "neo4j":
+            from src.graph_backend import Neo4jGraphBackend
+            graph_backend = Neo4jGraphBackend.from_env(max_pool_size=NEO4J_POOL_SIZE)
+
+        rag_engine = SmartGraphRAG(llm_model=llm, graph_backend=graph_backend)
         
         init(rag_engine)
         
@@ -41,8 +65,16 @@ async def startup_event():
         print(f"Lỗi khởi tạo: {e}")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    inference_pool.shutdown()
+    if rag_engine is not None:
+        rag_engine.graph_backend.close()
+
+
 class ChatRequest(BaseModel):
     message: str
+    include_timings: bool = False
 
 @app.post("/api/chat")
 async def chat_endpoint(request: ChatRequest):
@@ -50,12 +82,90 @@ async def chat_endpoint(request: ChatRequest):
         raise HTTPException(status_code=500, detail="Hệ thống chưa khởi tạo xong")
     
     try:
-    
-        response_text = rag_engine.query(request.message)
+        trace = QueryTrace()
+        response_text = await inference_pool.run(rag_engine.query, request.message, trace=trace)
+        if request.include_timings:
+            return {"response": response_text, "timings": trace.as_dict()}
         return {"response": response_text}
+    except PoolSaturated:
+        raise _overloaded()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _overloaded() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Hệ thống đang quá tải, vui lòng thử lại sau",
+        headers={"Retry-After": str(RAG_RETRY_AFTER)},
+    )
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/api/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """Server-Sent Events: một event ``context`` rồi các event ``token``, kết thúc bằng ``done`` hoặc ``error``."""
+    if rag_engine is None:
+        raise HTTPException(status_code=500, detail="Hệ thống chưa khởi tạo xong")
+
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    # Đặt khi client ngắt kết nối: producer dừng sinh ở token kế tiếp và trả worker về pool
+    stop = threading.Event()
+
+    def produce():
+        if stop.is_set():
+            return
+        try:
+            for event in rag_engine.query_stream(request.message, stop=stop):
+                if stop.is_set():
+                    return
+                loop.call_soon_threadsafe(events.put_nowait, (event["event"], event["data"]))
+            loop.call_soon_threadsafe(events.put_nowait, ("done", ""))
+        except Exception as e:
+            loop.call_soon_threadsafe(events.put_nowait, ("error", str(e)))
+
+    try:
+        inference_pool.submit(produce)
+    except PoolSaturated:
+        raise _overloaded()
+
+    async def stream():
+        # Client ngắt kết nối thì Starlette huỷ generator này (CancelledError/GeneratorExit), finally báo producer dừng
+        try:
+            while True:
+                event, data = await events.get()
+                yield _sse(event, data)
+                if event in ("done", "error"):
+                    return
+        finally:
+            stop.set()
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 @app.get("/health")
 async def health_check():
-    return {"status": "active", "model": "GraphRAG Mark-2"}
+    return {
+        "status": "active",
+        "model": "GraphRAG Mark-2",
+        "inference": inference_pool.stats(),
+        "cache": rag_engine.cache_stats() if rag_engine is not None else None,
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus text format: latency theo từng bước, số neo/ứng viên/token, cache và hàng đợi suy luận."""
+    lines = []
+    if rag_engine is not None:
+        lines += rag_engine.metrics.render()
+        cache_stats = rag_engine.cache_stats()
+        for field, kind in (("hits", "counter"), ("misses", "counter"), ("size", "gauge")):
+            name = f"graphrag_cache_{field}" + ("_total" if kind == "counter" else "")
+            lines += render_samples(
+                name, f"Query cache {field} per tier.", kind,
+                (({"tier": tier}, stats[field]) for tier, stats in cache_stats.items())
+            )
+    pool_stats = inference_pool.stats()
+    lines += render_samples("graphrag_inference_in_flight", "Requests running or queued on the inference pool.", "gauge", [({}, pool_stats["in_flight"])])
+    lines += render_samples("graphrag_inference_capacity", "Workers plus admission queue depth.", "gauge", [({}, pool_stats["capacity"])])
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
@@ -0,0 +1,121 @@
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Sequence
+
+
+class RateLimiter:
+    """Spaces calls at least ``1 / rate`` seconds apart across all threads; ``rate <= 0`` disables it."""
+
+    def __init__(self, rate: float = 0.0):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def checkpoint_path_for(output_json: str) -> str:
+    root, _ = os.path.splitext(output_json)
+    return root + ".jsonl"
+
+
+def load_checkpoint(path: str) -> Dict[int, Dict[str, str]]:
+    """
+    Completed records from a JSONL checkpoint, keyed by question index. A
+    torn last line (process killed mid-write) is ignored, so that question
+    simply runs again.
+    """
+    done: Dict[int, Dict[str, str]] = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "answer" in record:
+                done[int(record["index"])] = record
+    return done
+
+
+def _terminate_torn_line(path: str):
+    # Dòng cuối bị cắt dở phải xuống dòng trước khi ghi tiếp, nếu không bản ghi mới dính vào nó
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+def run_batch(
+    questions: Sequence[str],
+    answer_fn: Callable[[str], str],
+    checkpoint_path: str,
+    concurrency: int = 4,
+    rate: float = 0.0,
+    on_result: Optional[Callable[[Dict[str, str]], None]] = None,
+) -> List[Dict[str, str]]:
+    """
+    Answer ``questions`` on ``concurrency`` worker threads, at most ``rate``
+    questions per second, appending each ``{index, question, answer}`` to
+    ``checkpoint_path`` as soon as it completes. Questions already recorded
+    there (same index and text) are skipped, so a crashed run resumes where
+    it stopped. Failed questions are reported on stderr and left out of the
+    checkpoint to be retried next run. Returns all completed records in
+    question order.
+    """
+    done = {
+        index: record
+        for index, record in load_checkpoint(checkpoint_path).items()
+        if index < len(questions) and record.get("question") == questions[index]
+    }
+    pending = [index for index in range(len(questions)) if index not in done]
+    if done:
+        print(f"Resuming: {len(done)} done, {len(pending)} left ({checkpoint_path})", file=sys.stderr)
+
+    limiter = RateLimiter(rate)
+
+    def answer(index: int) -> Dict[str, str]:
+        limiter.acquire()
+        question = questions[index]
+        return {"index": index, "question": question, "answer": answer_fn(question)}
+
+    failed = 0
+    _terminate_torn_line(checkpoint_path)
+    with open(checkpoint_path, "a", encoding="utf-8") as sink, \
+            ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="batch-q") as executor:
+        futures = {executor.submit(answer, index): index for index in pending}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                record = future.result()
+            except Exception as exc:
+                failed += 1
+                print(f"[{index}] failed: {exc!r}", file=sys.stderr)
+                continue
+            sink.write(json.dumps(record, ensure_ascii=False) + "\n")
+            sink.flush()
+            done[index] = record
+            if on_result is not None:
+                on_result(record)
+
+    if failed:
+        print(f"{failed} question(s) failed; rerun to retry them.", file=sys.stderr)
+    return [done[index] for index in sorted(done)]
@@ -0,0 +1,87 @@
+import json
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.graph_index import GraphIndex
+
+EDGE_EMBEDDINGS_DIR = "edge_embeddings"
+
+Triplet = Tuple[str, str, str]
+
+
+class EdgeEmbeddingCache:
+    """
+    Precomputed embeddings of the neighbor-triplet strings, one L2-normalised
+    float16 row per graph edge, keyed by ``(src, des, relation)``.
+
+    On disk the cache is a directory with ``embeddings.npy`` (memory-mapped on
+    load), ``keys.json`` (the triplet of every row) and ``meta.json``.
+    """
+
+    def __init__(self, keys: List[Triplet], matrix: np.ndarray, model: Optional[str] = None):
+        self.keys = keys
+        self.matrix = matrix
+        self.model = model
+        self.rows: Dict[Triplet, int] = {key: i for i, key in enumerate(keys)}
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1]
+
+    @classmethod
+    def build(
+        cls,
+        index: GraphIndex,
+        embed_documents: Callable[[List[str]], List[List[float]]],
+        format_edge: Callable[[str, str, str], str],
+        directory: str = EDGE_EMBEDDINGS_DIR,
+        batch_size: int = 256,
+        model: Optional[str] = None,
+    ) -> "EdgeEmbeddingCache":
+        os.makedirs(directory, exist_ok=True)
+        keys: List[Triplet] = []
+        matrix = None
+        for start in range(0, index.num_edges, batch_size):
+            batch: List[Triplet] = []
+            for e in range(start, min(start + batch_size, index.num_edges)):
+                u, v, rel = index.edge(e)
+                batch.append((index.names[u], index.names[v], rel))
+            vecs = np.asarray(embed_documents([format_edge(*key) for key in batch]), dtype=np.float32)
+            norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+            vecs = np.divide(vecs, norms, out=np.zeros_like(vecs), where=norms > 0)
+            if matrix is None:
+                matrix = np.lib.format.open_memmap(
+                    os.path.join(directory, "embeddings.npy"),
+                    mode="w+",
+                    dtype=np.float16,
+                    shape=(index.num_edges, vecs.shape[1]),
+                )
+            matrix[start:start + len(batch)] = vecs
+            keys.extend(batch)
+            print(f"Embedded {len(keys)}/{index.num_edges} edges")
+
+        if matrix is None:
+            matrix = np.zeros((0, 0), dtype=np.float16)
+            np.save(os.path.join(directory, "embeddings.npy"), matrix)
+        else:
+            matrix.flush()
+        with open(os.path.join(directory, "keys.json"), "w", encoding="utf-8") as f:
+            json.dump(keys, f, ensure_ascii=False)
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"model": model, "rows": len(keys), "dim": int(matrix.shape[1])}, f)
+        return cls.load(directory)
+
+    @classmethod
+    def load(cls, directory: str = EDGE_EMBEDDINGS_DIR) -> "EdgeEmbeddingCache":
+        matrix = np.load(os.path.join(directory, "embeddings.npy"), mmap_mode="r")
+        with open(os.path.join(directory, "keys.json"), "r", encoding="utf-8") as f:
+            keys = [tuple(key) for key in json.load(f)]
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(keys, matrix, model=meta.get("model"))
+
+    def rows_of(self, keys: List[Triplet]) -> np.ndarray:
+        """Cache row of each ``(src, des, relation)``, ``-1`` for edges added since the build."""
+        return np.fromiter((self.rows.get(key, -1) for key in keys), dtype=np.int64, count=len(keys))
@@ -0,0 +1,70 @@
+import re
+from typing import Dict, Iterable, List, Tuple
+
+from src.text_norm import fold_name
+
+_TOKEN = re.compile(r"[\w'-]+")
+_END = "\0"
+
+
+def name_tokens(text: str) -> List[Tuple[str, str]]:
+    """``(original, folded)`` pairs for every word of ``text``."""
+    pairs = []
+    for match in _TOKEN.finditer(text):
+        folded = fold_name(match.group())
+        if folded:
+            pairs.append((match.group(), folded))
+    return pairs
+
+
+class EntityGazetteer:
+    """
+    Token trie over accent-folded node names, used to spot graph entities in a
+    question without calling the LLM.
+
+    Matching is leftmost-longest over words, so "Giải Nobel Vật lý" wins over
+    "Giải Nobel". One-word names such as "Anh", "Ý" or "Năm" collide with
+    ordinary Vietnamese words, so they only match when written capitalised and
+    not as the first word of the question.
+    """
+
+    def __init__(self, names: Iterable[str], min_chars: int = 2):
+        self.root: Dict = {}
+        self.size = 0
+        for name in names:
+            tokens = [folded for _, folded in name_tokens(name)]
+            if not tokens or len("".join(tokens)) < min_chars:
+                continue
+            node = self.root
+            for token in tokens:
+                node = node.setdefault(token, {})
+            bucket = node.setdefault(_END, [])
+            if name not in bucket:
+                bucket.append(name)
+                self.size += 1
+
+    def find(self, text: str) -> List[str]:
+        tokens = name_tokens(text)
+        found: List[str] = []
+        i = 0
+        while i < len(tokens):
+            node = self.root
+            best = None
+            j = i
+            while j < len(tokens) and tokens[j][1] in node:
+                node = node[tokens[j][1]]
+                j += 1
+                if _END in node:
+                    best = (j, node[_END])
+            if best is not None and best[0] - i == 1:
+                original = tokens[i][0]
+                if i == 0 or not original[:1].isupper():
+                    best = None
+            if best is None:
+                i += 1
+                continue
+            for name in best[1]:
+                if name not in found:
+                    found.append(name)
+            i = best[0]
+        return found
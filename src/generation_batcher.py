@@ -0,0 +1,123 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, List, Optional, Tuple
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.llms import LLM
+
+
+class GenerationBatcher:
+    """
+    Dynamic micro-batching in front of a transformers text-generation pipeline.
+
+    Callers submit single prompts from any thread. A scheduler thread takes
+    the first waiting prompt, keeps collecting for up to ``max_wait_ms`` or
+    until ``max_batch_size`` prompts are pending, runs them as one left-padded
+    batch and resolves each caller's future with its own completion.
+    """
+
+    def __init__(self, pipe, max_batch_size: int = 8, max_wait_ms: float = 10.0):
+        self.pipe = pipe
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        tokenizer = pipe.tokenizer
+        # Decoder-only models must be padded on the left to generate in a batch
+        tokenizer.padding_side = "left"
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+
+        # Giữ trong lúc pipeline chạy: batch và các lượt sinh ngoài hàng đợi (stream) không chạy song song
+        self.lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Tuple[str, Future]]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name="generation-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, prompt: str) -> Future:
+        future: Future = Future()
+        self._queue.put((prompt, future))
+        return future
+
+    def generate(self, prompt: str) -> str:
+        return self.submit(prompt).result()
+
+    def run_exclusive(self, prompt: str, **kwargs: Any):
+        """
+        One pipeline call outside the batch queue (e.g. with a ``streamer``),
+        holding the same lock as the batches so only one thread drives the
+        model at a time.
+        """
+        with self.lock:
+            return self.pipe(prompt, **kwargs)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first: Tuple[str, Future]) -> Tuple[List[Tuple[str, Future]], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _loop(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stop = self._collect(first)
+            batch = [(prompt, future) for prompt, future in batch if future.set_running_or_notify_cancel()]
+            if batch:
+                self._run(batch)
+            if stop:
+                return
+
+    def _run(self, batch: List[Tuple[str, Future]]):
+        prompts = [prompt for prompt, _ in batch]
+        try:
+            with self.lock:
+                outputs = self.pipe(prompts, batch_size=len(prompts))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), output in zip(batch, outputs):
+            future.set_result(output[0]["generated_text"])
+
+
+class BatchedPipelineLLM(LLM):
+    """LangChain LLM whose calls are routed through a shared ``GenerationBatcher``."""
+
+    batcher: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "batched_huggingface_pipeline"
+
+    @property
+    def pipeline(self):
+        return self.batcher.pipe
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        text = self.batcher.generate(prompt)
+        for token in stop or []:
+            text = text.split(token)[0]
+        return text
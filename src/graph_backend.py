@@ -0,0 +1,276 @@
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.graph_index import GraphIndex
+from src.node_table import NodeTable
+
+Triplet = Tuple[str, str, str]
+# (head, tail, relation) theo chiều của cạnh; relation là None khi hai node kề nhau nhưng không tra được cạnh
+Hop = Tuple[str, str, Optional[str]]
+
+# Giới hạn an toàn số cạnh một truy vấn lân cận trả về
+MAX_NEIGHBOR_EDGES = 10_000
+# Số cạnh ra tối đa mỗi node frontier (từ bước 2) được mở rộng khi lấy lân cận (chặn các node hub);
+# cạnh ra của chính các neo luôn được lấy hết
+NEIGHBOR_FANOUT = 16
+
+
+class GraphBackend:
+    """
+    Graph storage read by the ``SmartGraphRAG`` query path. Nodes are handled
+    as integer ids from ``resolve``; names are only returned inside the
+    triplets and hops used to format context.
+    """
+
+    def node_names(self) -> List[str]:
+        """Display names of every node, for the gazetteer and the anchor resolver."""
+        raise NotImplementedError
+
+    def resolve(self, names: List[str]) -> List[int]:
+        """Node ids of ``names``, in order and without duplicates; unknown names are dropped."""
+        raise NotImplementedError
+
+    def neighbor_edges(self, nodes: List[int], depth: int, limit: Optional[int] = None) -> List[Triplet]:
+        """
+        ``(src, des, relation)`` of edges within ``depth`` out-hops of
+        ``nodes``: every out-edge of ``nodes`` themselves, then, from the
+        second hop on, best-priority edges first with at most ``fanout``
+        edges expanded per frontier node, until ``limit`` edges in total.
+        """
+        raise NotImplementedError
+
+    def paths(self, nodes: List[int], max_hops: int, limit: int) -> List[List[Hop]]:
+        """Up to ``limit`` undirected paths of at most ``max_hops`` edges between pairs of ``nodes``, shortest first per pair."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+def _unique_ids(ids) -> List[int]:
+    out: List[int] = []
+    for node in ids:
+        if node is not None and node not in out:
+            out.append(node)
+    return out
+
+
+class InMemoryGraphBackend(GraphBackend):
+    """
+    The CSR ``GraphIndex`` held by the ``SmartGraphRAG`` itself (default
+    backend). Neighbor edges are prioritized by ``GraphIndex.edge_priorities``
+    (``priority`` of the target node times ``relation_priors``).
+    """
+
+    def __init__(
+        self,
+        get_index: Callable[[], GraphIndex],
+        fanout: Optional[int] = NEIGHBOR_FANOUT,
+        priority: str = "inverse_degree",
+        relation_priors: Optional[Dict[str, float]] = None,
+    ):
+        self._get_index = get_index
+        self.fanout = fanout
+        self.priority = priority
+        self.relation_priors = relation_priors
+
+    def node_names(self) -> List[str]:
+        return self._get_index().names
+
+    def resolve(self, names: List[str]) -> List[int]:
+        index = self._get_index()
+        return _unique_ids(index.node_id(name) for name in names)
+
+    def neighbor_edges(self, nodes: List[int], depth: int, limit: Optional[int] = None) -> List[Triplet]:
+        index = self._get_index()
+        names = index.names
+        priorities = index.edge_priorities(self.priority, self.relation_priors)
+        triplets = []
+        for e in index.expand_edges(nodes, depth, priorities, max_edges=limit, fanout=self.fanout):
+            u, v, rel = index.edge(e)
+            triplets.append((names[u], names[v], rel))
+        return triplets
+
+    def _hop(self, index: GraphIndex, u: int, v: int) -> Hop:
+        for head, tail in ((u, v), (v, u)):
+            e = index.edge_id(head, tail)
+            if e is not None:
+                return index.names[head], index.names[tail], index.relations[index.out_relations[e]]
+        return index.names[u], index.names[v], None
+
+    def paths(self, nodes: List[int], max_hops: int, limit: int) -> List[List[Hop]]:
+        index = self._get_index()
+        paths: List[List[Hop]] = []
+        for i in range(len(nodes)):
+            for j in range(i + 1, len(nodes)):
+                for path in index.simple_paths(nodes[i], nodes[j], max_hops, limit=limit - len(paths)):
+                    paths.append([self._hop(index, u, v) for u, v in zip(path, path[1:])])
+                if len(paths) >= limit:
+                    return paths
+        return paths
+
+
+class Neo4jGraphBackend(GraphBackend):
+    """
+    Reads neighborhoods and paths from the Neo4j graph written by
+    ``GraphBuilder`` (``Entity`` nodes, one relationship type per schema
+    label) with parameterized Cypher over the driver's connection pool: one
+    query per neighborhood hop, one for the paths between all anchor pairs.
+    Only the node table (name, link) is kept in process; edges stay in the
+    database.
+    """
+
+    # Một truy vấn mỗi bước: mỗi node frontier mở rộng tối đa $fanout cạnh ra, ưu tiên đích ít bậc
+    # (hoặc có thuộc tính pagerank lớn, ghi bởi gds.pageRank.write)
+    EXPAND_QUERY = (
+        "UNWIND $names AS name "
+        "MATCH (s:Entity {{name: name}}) "
+        "CALL {{ "
+        "WITH s "
+        "MATCH (s)-[r]->(t:Entity) "
+        "WITH r, t, {weight} AS weight "
+        "ORDER BY weight DESC "
+        "LIMIT $fanout "
+        "RETURN type(r) AS rel, t.name AS des, weight "
+        "}} "
+        "RETURN s.name AS src, rel, des, weight"
+    )
+    NODE_WEIGHTS = {
+        "inverse_degree": "1.0 / (1 + COUNT { (t)--() })",
+        "pagerank": "coalesce(t.pagerank, 0.0)",
+        "none": "1.0",
+    }
+    # Số bước của mẫu độ dài biến thiên không truyền được qua tham số nên được chèn dưới dạng số nguyên
+    PATHS_QUERY = (
+        "UNWIND $pairs AS pair "
+        "MATCH (s:Entity {{name: pair[0]}}), (t:Entity {{name: pair[1]}}) "
+        "MATCH p = allShortestPaths((s)-[*..{max_hops}]-(t)) "
+        "WITH p LIMIT $limit "
+        "RETURN [r IN relationships(p) | [startNode(r).name, endNode(r).name, type(r)]] AS hops"
+    )
+
+    def __init__(
+        self,
+        driver,
+        database: Optional[str] = None,
+        relation_labels: Optional[Dict[str, str]] = None,
+        max_edges: int = MAX_NEIGHBOR_EDGES,
+        fanout: Optional[int] = NEIGHBOR_FANOUT,
+        priority: str = "inverse_degree",
+        relation_priors: Optional[Dict[str, float]] = None,
+    ):
+        if priority not in self.NODE_WEIGHTS:
+            raise ValueError(f"Unknown priority method {priority!r}, expected one of {tuple(self.NODE_WEIGHTS)}")
+        self.driver = driver
+        self.database = database
+        # relationship type (GIAI_THUONG) -> nhãn trong edges.csv (Giải thưởng), để context giống backend trong bộ nhớ
+        self.relation_labels = relation_labels or {}
+        self.max_edges = max_edges
+        self.fanout = fanout
+        self.priority = priority
+        # theo nhãn quan hệ của edges.csv, như InMemoryGraphBackend
+        self.relation_priors = relation_priors or {}
+        self._nodes: Optional[NodeTable] = None
+
+    @classmethod
+    def from_env(cls, max_pool_size: int = 50) -> "Neo4jGraphBackend":
+        """Driver from ``NEO4J_URI``/``NEO4J_USER`` (or ``NEO4J_USERNAME``)/``NEO4J_PASSWORD``/``NEO4J_DATABASE``."""
+        from neo4j import GraphDatabase
+
+        from src.GraphBuilder.db.schema import PERSON_RELATIONSHIP_SCHEMAS
+
+        user = os.getenv("NEO4J_USER") or os.getenv("NEO4J_USERNAME", "neo4j")
+        driver = GraphDatabase.driver(
+            os.getenv("NEO4J_URI", "bolt://localhost:7687"),
+            auth=(user, os.getenv("NEO4J_PASSWORD", "").strip()),
+            max_connection_pool_size=max_pool_size,
+        )
+        labels = {schema["relationship_type"]: schema["label"] for schema in PERSON_RELATIONSHIP_SCHEMAS.values()}
+        return cls(driver, database=os.getenv("NEO4J_DATABASE") or None, relation_labels=labels)
+
+    def _run(self, query: str, **params):
+        from neo4j import RoutingControl
+
+        records, _, _ = self.driver.execute_query(
+            query, parameters_=params, database_=self.database, routing_=RoutingControl.READ
+        )
+        return records
+
+    @property
+    def nodes(self) -> NodeTable:
+        if self._nodes is None:
+            self.refresh()
+        return self._nodes
+
+    def refresh(self) -> NodeTable:
+        """Reload the node table (after the database was rebuilt)."""
+        records = self._run("MATCH (n:Entity) RETURN n.name AS name, n.link AS link")
+        names = [record["name"] for record in records]
+        nodes = NodeTable.from_names(names)
+        nodes.add_aliases([record["link"] for record in records], names)
+        self._nodes = nodes
+        return nodes
+
+    def node_names(self) -> List[str]:
+        return self.nodes.names
+
+    def resolve(self, names: List[str]) -> List[int]:
+        nodes = self.nodes
+        return _unique_ids(nodes.lookup(name) for name in names)
+
+    def _relation(self, relationship_type: str) -> str:
+        return self.relation_labels.get(relationship_type, relationship_type)
+
+    def neighbor_edges(self, nodes: List[int], depth: int, limit: Optional[int] = None) -> List[Triplet]:
+        query = self.EXPAND_QUERY.format(weight=self.NODE_WEIGHTS[self.priority])
+        table = self.nodes
+        frontier = [table.names[node] for node in nodes]
+        reached = set(nodes)
+        taken = set()
+        triplets: List[Triplet] = []
+        for hop in range(depth):
+            # Bước đầu lấy mọi cạnh ra của neo (chỉ chặn bởi max_edges); limit và fanout áp dụng từ bước 2
+            first = hop == 0
+            budget = self.max_edges if first or limit is None else min(limit, self.max_edges)
+            if not frontier or len(triplets) >= budget:
+                break
+            fanout = self.fanout if self.fanout is not None and not first else budget
+            records = self._run(query, names=frontier, fanout=fanout)
+            picks = []
+            rank: Dict[str, int] = {}
+            for record in records:
+                rel = self._relation(record["rel"])
+                score = float(record["weight"]) * self.relation_priors.get(rel, 1.0)
+                picks.append((record["src"], record["des"], rel, score))
+            # Xếp lại theo ưu tiên trong từng node nguồn, rồi lần lượt qua các node như GraphIndex.expand_edges
+            picks.sort(key=lambda pick: -pick[3])
+            ranked = []
+            for src, des, rel, score in picks:
+                rank[src] = rank.get(src, -1) + 1
+                ranked.append((rank[src], -score, src, des, rel))
+            ranked.sort(key=lambda item: item[:2])
+
+            frontier = []
+            for _, _, src, des, rel in ranked:
+                if (src, des, rel) in taken:
+                    continue
+                taken.add((src, des, rel))
+                triplets.append((src, des, rel))
+                if len(triplets) >= budget:
+                    return triplets
+                node = table.lookup(des)
+                if node is not None and node not in reached:
+                    reached.add(node)
+                    frontier.append(des)
+        return triplets
+
+    def paths(self, nodes: List[int], max_hops: int, limit: int) -> List[List[Hop]]:
+        if len(nodes) < 2 or max_hops < 1 or limit <= 0:
+            return []
+        names = self.nodes.names
+        pairs = [[names[nodes[i]], names[nodes[j]]] for i in range(len(nodes)) for j in range(i + 1, len(nodes))]
+        records = self._run(self.PATHS_QUERY.format(max_hops=int(max_hops)), pairs=pairs, limit=limit)
+        return [[(head, tail, self._relation(rel)) for head, tail, rel in record["hops"]] for record in records]
+
+    def close(self):
+        self.driver.close()
@@ -0,0 +1,378 @@
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from src.node_table import NodeTable
+
+# Upper bound on adjacency entries scanned per anchor pair in simple_paths.
+# On data/final/edges.csv, hub-to-hub pairs then take p95 ~0.5 ms / max ~1 ms
+# with max_hops=3, and p95 ~3 ms / max ~7 ms with max_hops=4.
+PATH_SEARCH_BUDGET = 5_000
+
+# Node weights usable as edge priorities in expand_edges (weight of the edge's target).
+PRIORITY_METHODS = ("inverse_degree", "pagerank", "none")
+
+
+class GraphIndex:
+    """
+    Frozen CSR adjacency over the RAG graph.
+
+    Nodes (through a ``NodeTable``, so a name, link path or URL of the same
+    entity is one node) and relation labels are interned to dense integer
+    ids; node names are only looked up to format context. Edge ``e`` is
+    the ``e``-th slot of the out-arrays (edges sorted by source, then target),
+    so ``out_offsets[u]:out_offsets[u + 1]`` are the outgoing edges of ``u``.
+    ``und_offsets``/``und_targets`` are the deduplicated undirected view
+    used for multi-hop path search.
+    """
+
+    def __init__(
+        self,
+        nodes: Union[NodeTable, List[str]],
+        relations: List[str],
+        sources: np.ndarray,
+        targets: np.ndarray,
+        relation_ids: np.ndarray,
+    ):
+        self.nodes = nodes if isinstance(nodes, NodeTable) else NodeTable.from_names(nodes)
+        self.relations = relations
+
+        num_nodes = len(self.nodes)
+        sources = np.asarray(sources, dtype=np.int32)
+        targets = np.asarray(targets, dtype=np.int32)
+        relation_ids = np.asarray(relation_ids, dtype=np.int32)
+
+        order = np.lexsort((targets, sources))
+        self.edge_sources = sources[order]
+        self.out_targets = targets[order]
+        self.out_relations = relation_ids[order]
+        self.out_offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.edge_sources, minlength=num_nodes), out=self.out_offsets[1:])
+
+        both = np.concatenate([
+            self.edge_sources.astype(np.int64) * num_nodes + self.out_targets,
+            self.out_targets.astype(np.int64) * num_nodes + self.edge_sources,
+        ])
+        # sort + diff: nhanh hơn nhiều so với np.unique (bảng băm) trên hàng triệu khoá int64
+        both.sort()
+        both = both[np.concatenate(([True], both[1:] != both[:-1]))] if len(both) else both
+        und_sources = (both // max(num_nodes, 1)).astype(np.int32)
+        und_targets = (both % max(num_nodes, 1)).astype(np.int32)
+        not_loop = und_sources != und_targets
+        und_sources, self.und_targets = und_sources[not_loop], und_targets[not_loop]
+        self.und_offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(und_sources, minlength=num_nodes), out=self.und_offsets[1:])
+
+        self._priorities: Dict[tuple, np.ndarray] = {}
+        self._pagerank: Optional[np.ndarray] = None
+
+        for arr in (
+            self.edge_sources, self.out_targets, self.out_relations,
+            self.out_offsets, self.und_offsets, self.und_targets,
+        ):
+            arr.flags.writeable = False
+
+    @staticmethod
+    def _last_per_pair(sources: np.ndarray, targets: np.ndarray, num_nodes: int) -> np.ndarray:
+        """Positions to keep so each (source, target) pair appears once, with its last relation, in input order."""
+        keys = sources.astype(np.int64) * max(num_nodes, 1) + targets
+        _, last = np.unique(keys[::-1], return_index=True)
+        return np.sort(len(keys) - 1 - last)
+
+    @classmethod
+    def from_graph(cls, graph: nx.DiGraph) -> "GraphIndex":
+        nodes = NodeTable()
+        node_ids = dict(zip(graph.nodes(), nodes.intern_many(graph.nodes()).tolist()))
+        relations: List[str] = []
+        relation_ids: Dict[str, int] = {}
+
+        num_edges = graph.number_of_edges()
+        sources = np.empty(num_edges, dtype=np.int32)
+        targets = np.empty(num_edges, dtype=np.int32)
+        rels = np.empty(num_edges, dtype=np.int32)
+        for e, (u, v, rel) in enumerate(graph.edges(data="relation", default="liên quan")):
+            rel_id = relation_ids.get(rel)
+            if rel_id is None:
+                rel_id = relation_ids[rel] = len(relations)
+                relations.append(rel)
+            sources[e] = node_ids[u]
+            targets[e] = node_ids[v]
+            rels[e] = rel_id
+        keep = cls._last_per_pair(sources, targets, len(nodes))
+        return cls(nodes, relations, sources[keep], targets[keep], rels[keep])
+
+    @classmethod
+    def from_triplets(
+        cls,
+        subjects: Iterable[str],
+        objects: Iterable[str],
+        relations: Iterable[str],
+        nodes: Optional[NodeTable] = None,
+    ) -> "GraphIndex":
+        """
+        Build straight from column arrays, with the same result as adding
+        each triplet to an ``nx.DiGraph`` keyed by ``node_key``: nodes
+        numbered in first-seen order and, for a repeated (subject, object),
+        the last relation kept. ``nodes`` is extended in place, so existing
+        node ids keep their value.
+        """
+        nodes = nodes if nodes is not None else NodeTable()
+        subjects = np.asarray(subjects, dtype=object)
+        objects = np.asarray(objects, dtype=object)
+        # Mỗi chuỗi khác nhau chỉ chuẩn hoá một lần; các cạnh chỉ còn là mảng id
+        codes, raw_names = pd.factorize(np.column_stack([subjects, objects]).ravel())
+        ids = nodes.intern_many(raw_names)[codes]
+        sources, targets = ids[0::2], ids[1::2]
+        rel_codes, relations = pd.factorize(np.asarray(relations, dtype=object))
+
+        keep = cls._last_per_pair(sources, targets, len(nodes))
+        return cls(nodes, list(relations), sources[keep], targets[keep], rel_codes[keep])
+
+    def to_networkx(self) -> nx.DiGraph:
+        graph = nx.DiGraph()
+        graph.add_nodes_from(self.names)
+        names, relations = self.names, self.relations
+        graph.add_edges_from(
+            (names[u], names[v], {"relation": relations[r]})
+            for u, v, r in zip(self.edge_sources.tolist(), self.out_targets.tolist(), self.out_relations.tolist())
+        )
+        return graph
+
+    @property
+    def names(self) -> List[str]:
+        return self.nodes.names
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.out_targets)
+
+    def node_id(self, name: str) -> Optional[int]:
+        """Id of a node by display name, raw link path, URL or any spelling with the same canonical form."""
+        return self.nodes.lookup(name)
+
+    def successors(self, u: int) -> List[int]:
+        return self.out_targets[self.out_offsets[u]:self.out_offsets[u + 1]].tolist()
+
+    def neighbors(self, u: int) -> List[int]:
+        return self.und_targets[self.und_offsets[u]:self.und_offsets[u + 1]].tolist()
+
+    def degree(self, u: int) -> int:
+        return int(self.und_offsets[u + 1] - self.und_offsets[u])
+
+    def edge_id(self, u: int, v: int) -> Optional[int]:
+        lo, hi = int(self.out_offsets[u]), int(self.out_offsets[u + 1])
+        pos = lo + int(np.searchsorted(self.out_targets[lo:hi], v))
+        if pos < hi and self.out_targets[pos] == v:
+            return pos
+        return None
+
+    def edge(self, e: int):
+        """Return ``(source_id, target_id, relation)`` of edge ``e``."""
+        return int(self.edge_sources[e]), int(self.out_targets[e]), self.relations[self.out_relations[e]]
+
+    def pagerank(self, alpha: float = 0.85, max_iter: int = 100, tol: float = 1e-06) -> np.ndarray:
+        """
+        PageRank of every node over the out-edges, computed once per index by
+        power iteration on the CSR arrays; same fixed point as
+        ``nx.pagerank`` (dangling nodes spread uniformly).
+        """
+        if self._pagerank is not None:
+            return self._pagerank
+        n = self.num_nodes
+        if n == 0:
+            self._pagerank = np.zeros(0)
+            return self._pagerank
+        out_degree = np.diff(self.out_offsets).astype(np.float64)
+        dangling = out_degree == 0
+        share = np.zeros(n)
+        np.divide(1.0, out_degree, out=share, where=~dangling)
+        rank = np.full(n, 1.0 / n)
+        for _ in range(max_iter):
+            spread = np.bincount(self.out_targets, weights=(rank * share)[self.edge_sources], minlength=n)
+            new_rank = alpha * (spread + rank[dangling].sum() / n) + (1.0 - alpha) / n
+            converged = np.abs(new_rank - rank).sum() < n * tol
+            rank = new_rank
+            if converged:
+                break
+        self._pagerank = rank
+        return rank
+
+    def edge_priorities(self, method: str = "inverse_degree", relation_priors: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """
+        Score of every edge for ``expand_edges``: the weight of its target
+        node (``1 / (1 + degree)``, PageRank, or 1 for ``"none"``) times the
+        prior of its relation (default 1). Cached per method and priors.
+        """
+        if method not in PRIORITY_METHODS:
+            raise ValueError(f"Unknown priority method {method!r}, expected one of {PRIORITY_METHODS}")
+        key = (method, tuple(sorted((relation_priors or {}).items())))
+        cached = self._priorities.get(key)
+        if cached is not None:
+            return cached
+
+        if method == "inverse_degree":
+            node_weight = 1.0 / (1.0 + np.diff(self.und_offsets))
+        elif method == "pagerank":
+            node_weight = self.pagerank()
+        else:
+            node_weight = np.ones(self.num_nodes)
+        scores = node_weight[self.out_targets].astype(np.float32)
+        if relation_priors:
+            priors = np.array([relation_priors.get(rel, 1.0) for rel in self.relations], dtype=np.float32)
+            scores *= priors[self.out_relations]
+        scores.flags.writeable = False
+        self._priorities[key] = scores
+        return scores
+
+    def expand_edges(
+        self,
+        anchors: Iterable[int],
+        depth: int,
+        priorities: np.ndarray,
+        max_edges: Optional[int] = None,
+        fanout: Optional[int] = None,
+    ) -> List[int]:
+        """
+        Edge ids reached from ``anchors`` along out-edges within ``depth``
+        hops. Every out-edge of the anchors themselves is returned; from the
+        second hop on the expansion is hub-aware: each frontier node expands
+        at most ``fanout`` of its out-edges, the highest ``priorities``
+        first, each hop takes the best edge of every frontier node, then the
+        second best, and so on, and collection stops as soon as ``max_edges``
+        edges are taken.
+        """
+        edges: List[int] = []
+        taken = set()
+        frontier = list(dict.fromkeys(anchors))
+        reached = set(frontier)
+        for hop in range(depth):
+            # Cạnh ra của chính các neo không bị cắt: chúng thường chứa câu trả lời, rerank sẽ chọn
+            first = hop == 0
+            if not first and max_edges is not None and len(edges) >= max_edges:
+                break
+            cap = None if first else fanout
+            picks = []
+            for u in frontier:
+                lo, hi = int(self.out_offsets[u]), int(self.out_offsets[u + 1])
+                if lo == hi:
+                    continue
+                scores = priorities[lo:hi]
+                if cap is not None and hi - lo > cap:
+                    best = np.argpartition(-scores, cap - 1)[:cap]
+                    order = best[np.argsort(-scores[best], kind="stable")]
+                else:
+                    order = np.argsort(-scores, kind="stable")
+                picks.extend((rank, -float(scores[i]), lo + i) for rank, i in enumerate(order.tolist()))
+            # Vòng lần lượt qua các node: không node hub nào chiếm hết ngân sách của cả bước
+            picks.sort()
+
+            next_frontier = []
+            for _, _, e in picks:
+                if e in taken:
+                    continue
+                taken.add(e)
+                edges.append(e)
+                if not first and max_edges is not None and len(edges) >= max_edges:
+                    return edges
+                v = int(self.out_targets[e])
+                if v not in reached:
+                    reached.add(v)
+                    next_frontier.append(v)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return edges
+
+    def simple_paths(
+        self,
+        source: int,
+        target: int,
+        max_hops: int,
+        limit: int,
+        budget: int = PATH_SEARCH_BUDGET,
+    ) -> List[List[int]]:
+        """
+        Simple undirected paths of at most ``max_hops`` edges from ``source``
+        to ``target``, shortest first.
+
+        Meet-in-the-middle: half-paths of up to ``max_hops // 2`` edges are
+        grown from one endpoint, the lower-degree endpoint grows the other
+        half and the two are joined at the meeting node. Each path has exactly
+        one split point, so nothing is produced twice. The backward half may
+        use at most half of ``budget`` scanned adjacency entries. Returns the
+        ``limit`` shortest paths found within the budget, shortest first;
+        the search stops early only once ``limit`` paths shorter than any
+        still unexplored one are found.
+        """
+        if source == target or max_hops < 1 or limit <= 0:
+            return []
+        swapped = self.degree(source) > self.degree(target)
+        if swapped:
+            source, target = target, source
+
+        fwd_depth = (max_hops + 1) // 2
+        bwd_depth = max_hops - fwd_depth
+        work = 0
+
+        # Half-paths from the far endpoint, keyed by the node they end at.
+        # Nửa ngược được tối đa một nửa ngân sách, phần còn lại cho nửa xuôi và bước ghép
+        bwd_ends: Dict[int, List[Tuple[int, ...]]] = {}
+        frontier: List[Tuple[int, ...]] = [(target,)]
+        for _ in range(bwd_depth):
+            next_frontier = []
+            for path in frontier:
+                for v in self.neighbors(path[-1]):
+                    work += 1
+                    if v == source or v in path:
+                        continue
+                    extended = path + (v,)
+                    bwd_ends.setdefault(v, []).append(extended)
+                    next_frontier.append(extended)
+                if work > budget // 2:
+                    break
+            if work > budget // 2:
+                break
+            frontier = next_frontier
+
+        # Đường tới thẳng target (ngắn nhất tới lúc đó) và đường ghép ở bước cuối (dài hơn) giữ riêng,
+        # để cắt ở limit không bỏ mất đường ngắn hơn tìm thấy sau
+        found: List[Tuple[int, ...]] = []
+        joined: List[Tuple[int, ...]] = []
+        frontier = [(source,)]
+        for hop in range(1, fwd_depth + 1):
+            last = hop == fwd_depth
+            next_frontier = []
+            for path in frontier:
+                for v in self.neighbors(path[-1]):
+                    work += 1
+                    if v in path:
+                        continue
+                    if v == target:
+                        found.append(path + (v,))
+                    elif last:
+                        for tail in bwd_ends.get(v, ()):
+                            work += 1
+                            if not any(node in path for node in tail):
+                                joined.append(path + tuple(reversed(tail)))
+                            if work > budget:
+                                break
+                    else:
+                        next_frontier.append(path + (v,))
+                    if (last and len(found) >= limit) or work > budget:
+                        break
+                if (last and len(found) >= limit) or work > budget:
+                    break
+            # Sau mỗi bước các đường còn lại đều dài hơn, nên đủ limit đường thẳng là dừng được
+            if len(found) >= limit or work > budget:
+                break
+            frontier = next_frontier
+
+        found.extend(joined)
+        found.sort(key=len)
+        return [list(reversed(p)) if swapped else list(p) for p in found[:limit]]
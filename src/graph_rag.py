@@ -1,19 +1,34 @@
+import os
+import threading
 import networkx as nx
 import torch
 import re
-from typing import List, Optional, Set
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 import numpy as np
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.documents import Document
 from langchain_chroma import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings, HuggingFacePipeline
-from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
+from transformers import AutoModelForCausalLM, AutoTokenizer, StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer, pipeline
 from dotenv import load_dotenv
 
+from src.generation_batcher import BatchedPipelineLLM, GenerationBatcher
+from src.anchor_resolver import AnchorResolver
+from src.entity_gazetteer import EntityGazetteer
+from src.graph_backend import GraphBackend, Hop, InMemoryGraphBackend, Triplet
+from src.edge_embeddings import EDGE_EMBEDDINGS_DIR, EdgeEmbeddingCache
+from src.graph_index import GraphIndex
+from src.graph_snapshot import load_graph_snapshot, load_lookup_tables, save_graph_snapshot, save_lookup_tables
+from src.metrics import PipelineMetrics, QueryTrace
+from src.node_indexer import index_node_names
+from src.query_cache import MISSING, QueryCache, normalize_question
+
 load_dotenv()
 
-def load_tiny_vietnamese_llm():
+EMBEDDING_MODEL = "bkai-foundation-models/vietnamese-bi-encoder"
+
+def load_tiny_vietnamese_llm(max_batch_size: int = 1, max_wait_ms: float = 10.0):
     model_id = "Qwen/Qwen2.5-0.5B-Instruct"
     
     tokenizer = AutoTokenizer.from_pretrained(model_id)
@@ -40,21 +55,59 @@ def load_tiny_vietnamese_llm():
         return_full_text=False
     )
 
+    if max_batch_size > 1:
+        # Gom prompt (trích xuất thực thể + trả lời) của các request đồng thời thành một batch
+        return BatchedPipelineLLM(batcher=GenerationBatcher(pipe, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms))
     return HuggingFacePipeline(pipeline=pipe)
 
+class _StopOnEvent(StoppingCriteria):
+    """Ends ``generate`` at the next token once any of ``events`` is set."""
+
+    def __init__(self, *events: threading.Event):
+        self.events = events
+
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        return any(event.is_set() for event in self.events)
+
+
 class SmartGraphRAG:
-    def __init__(self, llm_model):
+    def __init__(
+        self,
+        llm_model,
+        cache_size: int = 1024,
+        cache_ttl: Optional[float] = 3600.0,
+        embedding_model=None,
+        vector_store=None,
+        graph_backend: Optional[GraphBackend] = None
+    ):
         self.llm = llm_model
-        self.graph = nx.DiGraph()
+        self._graph: Optional[nx.DiGraph] = nx.DiGraph()
+        self.index: Optional[GraphIndex] = None
+        # Mặc định đọc đồ thị từ chỉ mục trong bộ nhớ; Neo4jGraphBackend để truy vấn thẳng Neo4j
+        self.graph_backend = graph_backend if graph_backend is not None else InMemoryGraphBackend(self._get_index)
+        self.edge_cache: Optional[EdgeEmbeddingCache] = None
+        self.gazetteer: Optional[EntityGazetteer] = None
+        self._gazetteer_version: Optional[int] = None
+        self.anchor_resolver: Optional[AnchorResolver] = None
+        self._resolver_version: Optional[int] = None
         
-        self.embedding_model = HuggingFaceEmbeddings(model_name="bkai-foundation-models/vietnamese-bi-encoder")
+        if embedding_model is None:
+            embedding_model = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+        self.embedding_model = embedding_model
         
-        self.vector_store = Chroma(
-            collection_name="graph_nodes",
-            embedding_function=self.embedding_model,
-            persist_directory="chroma"
-        )
-        self.visited_nodes = set() 
+        if vector_store is None:
+            vector_store = Chroma(
+                collection_name="graph_nodes",
+                embedding_function=self.embedding_model,
+                persist_directory="chroma"
+            )
+        self.vector_store = vector_store
+
+        # Cache theo từng bước của query; tự xoá khi graph/vector store đổi version
+        self.graph_version = 0
+        self.vector_version = 0
+        self.cache = QueryCache(maxsize=cache_size, ttl=cache_ttl)
+        self.metrics = PipelineMetrics()
 
         self.entity_extract_prompt = PromptTemplate(
             template="""System: Bạn là bộ trích xuất thực thể. 
@@ -78,16 +131,138 @@ class SmartGraphRAG:
         )
         self.entity_chain = self.entity_extract_prompt | self.llm | StrOutputParser()
 
+    @property
+    def graph(self) -> nx.DiGraph:
+        # Sau load_snapshot chỉ có chỉ mục; DiGraph chỉ dựng lại khi thật sự cần
+        if self._graph is None:
+            self._graph = self.index.to_networkx() if self.index is not None else nx.DiGraph()
+        return self._graph
+
     def add_triplet(self, subj: str, obj: str, rel: str):
         self.graph.add_edge(subj, obj, relation=rel)
+        self.index = None
+        self.graph_version += 1
+
+    def add_triplets(self, subjects: Iterable[str], objects: Iterable[str], relations: Iterable[str]):
+        """Bulk ``add_triplet`` from column arrays: the index is built directly, without a per-edge NetworkX insert."""
+        if self.index is None and self._graph is not None and self._graph.number_of_edges():
+            self.build_index()
+        nodes = None
+        if self.index is not None and self.index.num_edges:
+            index = self.index
+            # Giữ nguyên id các node cũ; tên hiển thị nối lại vào đúng node nhờ node_key
+            nodes = index.nodes.copy()
+            names = np.asarray(index.names, dtype=object)
+            subjects = np.concatenate([names[index.edge_sources], np.asarray(subjects, dtype=object)])
+            objects = np.concatenate([names[index.out_targets], np.asarray(objects, dtype=object)])
+            relations = np.concatenate([
+                np.asarray(index.relations, dtype=object)[index.out_relations],
+                np.asarray(relations, dtype=object),
+            ])
+        self.index = GraphIndex.from_triplets(subjects, objects, relations, nodes=nodes)
+        self._graph = None
+        self.graph_version += 1
+
+    def add_node_aliases(self, links: Iterable[str], names: Iterable[str]) -> int:
+        """Resolve ``nodes.csv`` links (or any other aliases) to the node of the paired name."""
+        added = self._get_index().nodes.add_aliases(links, names)
+        if added:
+            self.graph_version += 1
+        return added
+
+    def build_index(self) -> GraphIndex:
+        self.index = GraphIndex.from_graph(self.graph)
+        return self.index
+
+    def _get_index(self) -> GraphIndex:
+        if self.index is None:
+            return self.build_index()
+        return self.index
+
+    @property
+    def in_memory(self) -> bool:
+        return isinstance(self.graph_backend, InMemoryGraphBackend)
+
+    def build_gazetteer(self) -> EntityGazetteer:
+        self.gazetteer = EntityGazetteer(self.graph_backend.node_names())
+        self._gazetteer_version = self.graph_version
+        return self.gazetteer
+
+    def _get_gazetteer(self) -> EntityGazetteer:
+        if self.gazetteer is None or self._gazetteer_version != self.graph_version:
+            return self.build_gazetteer()
+        return self.gazetteer
+
+    def build_anchor_resolver(self) -> AnchorResolver:
+        self.anchor_resolver = AnchorResolver(self.graph_backend.node_names())
+        self._resolver_version = self.graph_version
+        return self.anchor_resolver
+
+    def _get_anchor_resolver(self) -> AnchorResolver:
+        if self.anchor_resolver is None or self._resolver_version != self.graph_version:
+            return self.build_anchor_resolver()
+        return self.anchor_resolver
+
+    def save_lookups(self, path: str):
+        """Persist the gazetteer and anchor resolver so the next startup can skip building them."""
+        save_lookup_tables(path, self.graph_backend.node_names(), self._get_gazetteer(), self._get_anchor_resolver())
+
+    def load_lookups(self, path: str) -> bool:
+        tables = load_lookup_tables(path, self.graph_backend.node_names())
+        if tables is None:
+            return False
+        self.gazetteer, self.anchor_resolver = tables
+        self._gazetteer_version = self._resolver_version = self.graph_version
+        return True
+
+    def save_snapshot(self, path: str, source: Optional[str] = None, nodes_source: Optional[str] = None):
+        save_graph_snapshot(self._get_index(), path, source=source, nodes_source=nodes_source)
+
+    def load_snapshot(self, path: str, source: Optional[str] = None, nodes_source: Optional[str] = None) -> bool:
+        index = load_graph_snapshot(path, source=source, nodes_source=nodes_source)
+        if index is None:
+            return False
+        self.index = index
+        self._graph = None
+        self.graph_version += 1
+        return True
+
+    def build_edge_embeddings(self, directory: str = EDGE_EMBEDDINGS_DIR, batch_size: int = 256) -> EdgeEmbeddingCache:
+        self.edge_cache = EdgeEmbeddingCache.build(
+            self._get_index(),
+            self.embedding_model.embed_documents,
+            self._format_edge,
+            directory=directory,
+            batch_size=batch_size,
+            model=EMBEDDING_MODEL,
+        )
+        return self.edge_cache
+
+    def load_edge_embeddings(self, directory: str = EDGE_EMBEDDINGS_DIR) -> Optional[EdgeEmbeddingCache]:
+        if not os.path.exists(os.path.join(directory, "embeddings.npy")):
+            return None
+        cache = EdgeEmbeddingCache.load(directory)
+        if cache.model != EMBEDDING_MODEL:
+            print(f"Bỏ qua edge embeddings ở {directory}: model {cache.model} khác {EMBEDDING_MODEL}")
+            return None
+        self.edge_cache = cache
+        return cache
+
+    def index_nodes(self, names: List[str], batch_size: int = 256, show_progress: bool = True) -> int:
+        added = index_node_names(self.vector_store, names, batch_size=batch_size, show_progress=show_progress)
+        if added:
+            self.vector_version += 1
+        return added
+
+    def _sync_cache(self):
+        self.cache.sync((self.graph_version, self.vector_version))
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        return self.cache.stats()
 
     def build_vector(self, subj: str, obj: str, rel: str):
-        if subj not in self.visited_nodes:
-            self.vector_store.add_documents([Document(page_content=subj, metadata={"type": "node"})])
-            self.visited_nodes.add(subj)
-        if obj not in self.visited_nodes:
-            self.vector_store.add_documents([Document(page_content=obj, metadata={"type": "node"})])
-            self.visited_nodes.add(obj)
+        # Node đã có id trong vector store được index_node_names bỏ qua
+        self.index_nodes([subj, obj], show_progress=False)
 
     def _clean_entities(self, raw_text: str):
         first_line = raw_text.strip().split('\n')[0]
@@ -95,18 +270,61 @@ class SmartGraphRAG:
         entities = [e.strip() for e in clean_text.split(',') if e.strip()]
         return entities
 
+    def _extract_entities(self, user_question: str) -> List[str]:
+        key = normalize_question(user_question)
+        cached = self.cache["entities"].get(key)
+        if cached is not MISSING:
+            return list(cached)
+
+        # Tra tên node trong câu hỏi trước; chỉ gọi LLM khi gazetteer không tìm thấy gì
+        entities = self._get_gazetteer().find(user_question)
+        if not entities:
+            raw_extraction = self.entity_chain.invoke({"question": user_question})
+            entities = self._clean_entities(raw_extraction)
+        self.cache["entities"].set(key, tuple(entities))
+        return entities
+
+    def _vector_search(self, entities: List[str], k: int) -> List[List[str]]:
+        collection = getattr(self.vector_store, "_collection", None)
+        if collection is None:
+            return [
+                [doc.page_content for doc, _score in self.vector_store.similarity_search_with_score(entity, k=k)]
+                for entity in entities
+            ]
+        # Một batch encoder + một truy vấn Chroma cho tất cả thực thể còn lại
+        embeddings = self.embedding_model.embed_documents(entities)
+        results = collection.query(query_embeddings=embeddings, n_results=k, include=["documents"])
+        return [list(docs) for docs in results["documents"]]
+
     def _search_anchor_nodes(
         self,
         target_entities: List[str],
         per_entity_k: int = 3,
         max_anchors: int = 10
     ) -> List[str]:
+        key = (tuple(target_entities), per_entity_k, max_anchors)
+        cached = self.cache["anchors"].get(key)
+        if cached is not MISSING:
+            return list(cached)
+        anchors = self._resolve_anchor_nodes(target_entities, per_entity_k, max_anchors)
+        self.cache["anchors"].set(key, tuple(anchors))
+        return anchors
+
+    def _resolve_anchor_nodes(self, target_entities: List[str], per_entity_k: int, max_anchors: int) -> List[str]:
+        resolver = self._get_anchor_resolver()
+        per_entity = [resolver.resolve(entity, per_entity_k) for entity in target_entities]
+
+        unresolved = [i for i, hits in enumerate(per_entity) if not hits]
+        if unresolved:
+            vector_hits = self._vector_search([target_entities[i] for i in unresolved], per_entity_k)
+            for i, hits in zip(unresolved, vector_hits):
+                per_entity[i] = hits
+
         anchors: List[str] = []
-        for entity in target_entities:
-            results = self.vector_store.similarity_search_with_score(entity, k=per_entity_k)
-            for doc, _score in results:
-                if doc.page_content not in anchors:
-                    anchors.append(doc.page_content)
+        for hits in per_entity:
+            for node in hits:
+                if node not in anchors:
+                    anchors.append(node)
                 if len(anchors) >= max_anchors:
                     return anchors
         return anchors
@@ -115,98 +333,88 @@ class SmartGraphRAG:
         # Thêm mô tả rõ ràng để giảm việc mô hình coi chuỗi là token liền nhau
         return f"{u} có {rel} là {v}."
 
-    def _collect_neighbor_triplets(self, nodes: List[str], depth: int, max_edges: Optional[int] = None) -> List[str]:
-        context_triplets: List[str] = []
-        seen = set()
-        for node in nodes:
-            if not self.graph.has_node(node):
-                continue
-            subgraph = nx.ego_graph(self.graph, node, radius=depth)
-            for u, v, data in subgraph.edges(data=True):
-                rel = data.get('relation', 'liên quan')
-                edge_text = self._format_edge(u, v, rel)
-                if edge_text in seen:
-                    continue
-                seen.add(edge_text)
-                context_triplets.append(edge_text)
-                # if max_edges is not None and len(context_triplets) >= max_edges:
-                #     return context_triplets
-        return context_triplets
-
-    def _edge_text(self, u: str, v: str):
-        
-        if self.graph.has_edge(u, v):
-            rel = self.graph[u][v].get('relation', 'liên quan')
-            return f"{u} có quan hệ '{rel}' với {v}."
-            
-        if self.graph.has_edge(v, u):
-            rel = self.graph[v][u].get('relation', 'liên quan')
-            return f"{v} có quan hệ '{rel}' với {u}."
-            
-        return f"{u} và {v} có liên quan."
+    def _collect_neighbor_edges(self, anchor_ids: List[int], depth: int, max_edges: Optional[int] = None) -> List[Triplet]:
+        # Backend dừng ngay khi đủ max_edges cạnh (ưu tiên cao trước, mỗi node mở rộng tối đa fanout cạnh)
+        return self.graph_backend.neighbor_edges(anchor_ids, depth, limit=max_edges)
+
+    def _edge_text(self, hop: Hop) -> str:
+        head, tail, rel = hop
+        if rel is not None:
+            return f"{head} có quan hệ '{rel}' với {tail}."
+        return f"{head} và {tail} có liên quan."
 
-    def _format_path(self, nodes: List[str]) -> str:
-        parts = []
-        for u, v in zip(nodes, nodes[1:]):
-            parts.append(self._edge_text(u, v))
+    def _format_path(self, hops: List[Hop]) -> str:
         # Dùng dấu chấm phẩy để tách cạnh, tránh bị gộp thành một token liền nhau
-        return " ; ".join(parts)
+        return " ; ".join(self._edge_text(hop) for hop in hops)
 
     def _find_multi_hop_paths(
         self,
-        anchors: List[str],
+        anchor_ids: List[int],
         max_hops: int = 3,
         candidate_limit: int = 20
     ) -> List[str]:
-        if len(anchors) < 2:
+        if len(anchor_ids) < 2:
             return []
 
-        undirected_graph = self.graph.to_undirected()
         paths: List[str] = []
-        anchor_list = list(anchors)
-
-        for i in range(len(anchor_list)):
-            for j in range(i + 1, len(anchor_list)):
-                src = anchor_list[i]
-                dst = anchor_list[j]
-
-                if not undirected_graph.has_node(src) or not undirected_graph.has_node(dst):
-                    continue
-
-                for path in nx.all_simple_paths(undirected_graph, source=src, target=dst, cutoff=max_hops):
-                    if len(path) < 2:
-                        continue
-                    formatted_path = self._format_path(path)
-                    if formatted_path:
-                        paths.append(formatted_path)
-                    if len(paths) >= candidate_limit:
-                        return paths
-
+        for hops in self.graph_backend.paths(anchor_ids, max_hops, candidate_limit):
+            formatted_path = self._format_path(hops)
+            if formatted_path:
+                paths.append(formatted_path)
         return paths
 
-    def _cosine_similarity(self, a: List[float], b: List[float]) -> float:
-        va = np.array(a)
-        vb = np.array(b)
-        denom = np.linalg.norm(va) * np.linalg.norm(vb)
-        if denom == 0:
-            return 0.0
-        return float(np.dot(va, vb) / denom)
-
-    def _rerank_texts(self, texts: List[str], query: str, top_k: int) -> List[str]:
-        if not texts:
-            return []
-        if top_k <= 0:
-            return []
-        query_vec = self.embedding_model.embed_query(query)
-        doc_vecs = self.embedding_model.embed_documents(texts)
-        scored = []
-        for text, vec in zip(texts, doc_vecs):
-            scored.append((text, self._cosine_similarity(query_vec, vec)))
-            # print(f"Score {text}: {self._cosine_similarity(query_vec, vec)}")
-        scored.sort(key=lambda x: x[1], reverse=True)
-        return [text for text, _ in scored[:top_k]]
+    def _top_k(self, scores: np.ndarray, top_k: int) -> np.ndarray:
+        if top_k < len(scores):
+            candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            candidates = np.arange(len(scores))
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
 
-    def query(
+    def _rerank_groups(
+        self,
+        query: str,
+        groups: Sequence[Tuple[List[str], int, Optional[np.ndarray]]]
+    ) -> List[List[str]]:
+        """
+        Rerank several candidate lists against one question with a single
+        encoder batch. Each group is ``(texts, top_k, cache_rows)``; texts
+        with a row in ``self.edge_cache`` are scored from the cached vector,
+        the question and every other text go through one embed_documents call.
+        """
+        to_encode = [query]
+        plans = []
+        for texts, top_k, rows in groups:
+            if top_k <= 0 or not texts:
+                plans.append(None)
+                continue
+            if rows is None or self.edge_cache is None:
+                rows = np.full(len(texts), -1, dtype=np.int64)
+            encode_at = np.flatnonzero(rows < 0)
+            plans.append((texts, top_k, rows, encode_at, len(to_encode)))
+            to_encode.extend(texts[i] for i in encode_at)
+        if all(plan is None for plan in plans):
+            return [[] for _ in groups]
+
+        vectors = np.asarray(self.embedding_model.embed_documents(to_encode), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+        query_vec = vectors[0]
+
+        ranked: List[List[str]] = []
+        for plan in plans:
+            if plan is None:
+                ranked.append([])
+                continue
+            texts, top_k, rows, encode_at, offset = plan
+            scores = np.empty(len(texts), dtype=np.float32)
+            cached_at = np.flatnonzero(rows >= 0)
+            if len(cached_at):
+                scores[cached_at] = self.edge_cache.matrix[rows[cached_at]].astype(np.float32) @ query_vec
+            scores[encode_at] = vectors[offset:offset + len(encode_at)] @ query_vec
+            ranked.append([texts[i] for i in self._top_k(scores, top_k)])
+        return ranked
+
+    def _build_context(
         self,
         user_question: str,
         depth: int = 1,
@@ -217,40 +425,89 @@ class SmartGraphRAG:
         neighbor_top_k: int = 4,
         neighbor_candidate_multiplier: int = 3,
         path_candidate_multiplier: int = 3,
-        d: Optional[int] = None
-    ):
+        d: Optional[int] = None,
+        trace: Optional[QueryTrace] = None
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Return ``(context_text, None)``, or ``(None, message)`` when retrieval finds nothing to answer from."""
         print(f"\nQuestion: {user_question}")
 
         if d is not None:
             depth = d
-        
-        raw_extraction = self.entity_chain.invoke({"question": user_question})
-        target_entities = self._clean_entities(raw_extraction)
+        if trace is None:
+            trace = QueryTrace()
+
+        self._sync_cache()
+        key = (
+            normalize_question(user_question), depth, max_hops, top_k_paths, anchor_per_entity, max_anchors,
+            neighbor_top_k, neighbor_candidate_multiplier, path_candidate_multiplier
+        )
+        cached = self.cache["context"].get(key)
+        if cached is not MISSING:
+            trace.count("context_cache_hits", 1)
+            return cached
+        result = self._assemble_context(
+            trace, user_question, depth, max_hops, top_k_paths, anchor_per_entity, max_anchors,
+            neighbor_top_k, neighbor_candidate_multiplier, path_candidate_multiplier
+        )
+        self.cache["context"].set(key, result)
+        return result
+
+    def _assemble_context(
+        self,
+        trace: QueryTrace,
+        user_question: str,
+        depth: int,
+        max_hops: int,
+        top_k_paths: int,
+        anchor_per_entity: int,
+        max_anchors: int,
+        neighbor_top_k: int,
+        neighbor_candidate_multiplier: int,
+        path_candidate_multiplier: int
+    ) -> Tuple[Optional[str], Optional[str]]:
+        with trace.span("entity_extraction"):
+            target_entities = self._extract_entities(user_question)
         print(f"Entities: {target_entities}")
         
         if not target_entities:
-            return "Không trích xuất được thực thể nào."
-
-        found_anchors = self._search_anchor_nodes(
-            target_entities,
-            per_entity_k=anchor_per_entity,
-            max_anchors=max_anchors
-        )
+            return None, "Không trích xuất được thực thể nào."
+
+        with trace.span("anchor_search"):
+            found_anchors = self._search_anchor_nodes(
+                target_entities,
+                per_entity_k=anchor_per_entity,
+                max_anchors=max_anchors
+            )
+        trace.count("anchors", len(found_anchors))
         print(f"Anchor nodes: {found_anchors}")
 
         if not found_anchors:
-            return "Không tìm thấy node nào trong Graph."
+            return None, "Không tìm thấy node nào trong Graph."
 
         neighbor_candidate_limit = max(neighbor_top_k * neighbor_candidate_multiplier, neighbor_top_k)
-        neighbor_triplets = self._collect_neighbor_triplets(found_anchors, depth, max_edges=neighbor_candidate_limit)
-        neighbor_triplets = self._rerank_texts(list(neighbor_triplets), user_question, top_k=neighbor_top_k)
+        anchor_ids = self.graph_backend.resolve(found_anchors)
+        with trace.span("neighbor_collection"):
+            neighbor_edges = self._collect_neighbor_edges(anchor_ids, depth, max_edges=neighbor_candidate_limit)
+            neighbor_triplets = [self._format_edge(*edge) for edge in neighbor_edges]
+            neighbor_rows = None
+            if self.edge_cache is not None:
+                neighbor_rows = self.edge_cache.rows_of(neighbor_edges)
+        trace.count("neighbor_candidates", len(neighbor_triplets))
 
         path_candidate_limit = max(top_k_paths * path_candidate_multiplier, top_k_paths)
-        multi_hop_paths = self._find_multi_hop_paths(found_anchors, max_hops=max_hops, candidate_limit=path_candidate_limit)
-        multi_hop_paths = self._rerank_texts(multi_hop_paths, user_question, top_k=top_k_paths)
+        with trace.span("path_search"):
+            multi_hop_paths = self._find_multi_hop_paths(anchor_ids, max_hops=max_hops, candidate_limit=path_candidate_limit)
+        trace.count("path_candidates", len(multi_hop_paths))
+
+        # Rerank lân cận và đường đi chung một batch encoder nên đo chung một bước
+        with trace.span("rerank"):
+            neighbor_triplets, multi_hop_paths = self._rerank_groups(
+                user_question,
+                [(neighbor_triplets, neighbor_top_k, neighbor_rows), (multi_hop_paths, top_k_paths, None)]
+            )
 
         if not neighbor_triplets and not multi_hop_paths:
-            return "Tìm thấy node nhưng không có thông tin liên kết."
+            return None, "Tìm thấy node nhưng không có thông tin liên kết."
 
         context_sections = []
         if neighbor_triplets:
@@ -264,8 +521,10 @@ class SmartGraphRAG:
         context_text = context_text.replace("--", " quan hệ ").replace("-->", " là ")
         
         print(f"Context ném vào LLM:\n{context_text}")
+        return context_text, None
 
-        answer_prompt = f"""<|im_start|>system
+    def _answer_prompt(self, context_text: str, user_question: str) -> str:
+        return f"""<|im_start|>system
         Bạn là một máy trả lời câu hỏi chính xác. Chỉ sử dụng thông tin trong phần 'Dữ liệu' để trả lời.
         <|im_end|>
         <|im_start|>user
@@ -277,8 +536,145 @@ class SmartGraphRAG:
         <|im_end|>
         <|im_start|>assistant
 """
-        # Lưu ý: invoke của HuggingFacePipeline nhận string là ok
-        return self.llm.invoke(answer_prompt)
+
+    def query(
+        self,
+        user_question: str,
+        depth: int = 1,
+        max_hops: int = 3,
+        top_k_paths: int = 2,
+        anchor_per_entity: int = 3,
+        max_anchors: int = 10,
+        neighbor_top_k: int = 4,
+        neighbor_candidate_multiplier: int = 3,
+        path_candidate_multiplier: int = 3,
+        d: Optional[int] = None,
+        trace: Optional[QueryTrace] = None
+    ):
+        """Answer ``user_question``; pass a ``QueryTrace`` to get this request's per-stage timings."""
+        if trace is None:
+            trace = QueryTrace()
+        try:
+            context_text, message = self._build_context(
+                user_question,
+                depth=depth,
+                max_hops=max_hops,
+                top_k_paths=top_k_paths,
+                anchor_per_entity=anchor_per_entity,
+                max_anchors=max_anchors,
+                neighbor_top_k=neighbor_top_k,
+                neighbor_candidate_multiplier=neighbor_candidate_multiplier,
+                path_candidate_multiplier=path_candidate_multiplier,
+                d=d,
+                trace=trace
+            )
+            if context_text is None:
+                return message
+
+            # Câu trả lời chỉ phụ thuộc vào câu hỏi + context nên dùng cặp này làm khoá
+            key = (normalize_question(user_question), context_text)
+            answer = self.cache["answer"].get(key)
+            if answer is MISSING:
+                with trace.span("generation"):
+                    # Lưu ý: invoke của HuggingFacePipeline nhận string là ok
+                    answer = self.llm.invoke(self._answer_prompt(context_text, user_question))
+                trace.count("generated_tokens", self._count_tokens(answer))
+                self.cache["answer"].set(key, answer)
+            return answer
+        finally:
+            self.metrics.observe(trace)
+
+    def _count_tokens(self, text) -> int:
+        text = text if isinstance(text, str) else getattr(text, "content", str(text))
+        tokenizer = getattr(getattr(self.llm, "pipeline", None), "tokenizer", None)
+        if tokenizer is not None:
+            return len(tokenizer.encode(text, add_special_tokens=False))
+        return len(text.split())
+
+    def _stream_llm(self, prompt: str, stop: Optional[threading.Event] = None) -> Iterator[str]:
+        """Answer chunks for ``prompt``; generation ends early once ``stop`` is set or the iterator is closed."""
+        pipe = getattr(self.llm, "pipeline", None)
+        if pipe is None:
+            # LLM qua API (Gemini, ...): dùng stream chuẩn của LangChain
+            for chunk in self.llm.stream(prompt):
+                if stop is not None and stop.is_set():
+                    return
+                text = chunk if isinstance(chunk, str) else chunk.content
+                if text:
+                    yield text
+            return
+
+        # Pipeline local: generate chạy ở thread riêng, token đọc dần qua streamer.
+        # Có batcher thì đi qua khoá của nó để không chạy model song song với một batch
+        batcher = getattr(self.llm, "batcher", None)
+        run = batcher.run_exclusive if batcher is not None else pipe
+        streamer = TextIteratorStreamer(pipe.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        # Người đọc bỏ ngang (client ngắt kết nối) thì dừng generate ở token kế tiếp, nhả model cho request khác
+        closed = threading.Event()
+        events = (closed,) if stop is None else (closed, stop)
+        errors: List[BaseException] = []
+
+        def generate():
+            try:
+                run(prompt, streamer=streamer, stopping_criteria=StoppingCriteriaList([_StopOnEvent(*events)]))
+            except BaseException as e:
+                errors.append(e)
+                streamer.end()
+
+        worker = threading.Thread(target=generate, daemon=True)
+        worker.start()
+        try:
+            for text in streamer:
+                if stop is not None and stop.is_set():
+                    return
+                if text:
+                    yield text
+        finally:
+            closed.set()
+        worker.join()
+        if errors:
+            raise errors[0]
+
+    def query_stream(
+        self,
+        user_question: str,
+        trace: Optional[QueryTrace] = None,
+        stop: Optional[threading.Event] = None,
+        **params,
+    ) -> Iterator[Dict[str, str]]:
+        """
+        Same pipeline as ``query`` but yields events as they are ready:
+        ``{"event": "context", "data": ...}`` once retrieval is done, then
+        ``{"event": "token", "data": ...}`` per generated chunk. Setting
+        ``stop`` ends generation at the next token; a partial answer is not cached.
+        """
+        if trace is None:
+            trace = QueryTrace()
+        try:
+            context_text, message = self._build_context(user_question, trace=trace, **params)
+            if context_text is None:
+                yield {"event": "token", "data": message}
+                return
+
+            yield {"event": "context", "data": context_text}
+            key = (normalize_question(user_question), context_text)
+            answer = self.cache["answer"].get(key)
+            if answer is not MISSING:
+                yield {"event": "token", "data": answer}
+                return
+
+            chunks = []
+            with trace.span("generation"):
+                for text in self._stream_llm(self._answer_prompt(context_text, user_question), stop=stop):
+                    chunks.append(text)
+                    yield {"event": "token", "data": text}
+            if stop is not None and stop.is_set():
+                return
+            answer = "".join(chunks)
+            trace.count("generated_tokens", self._count_tokens(answer))
+            self.cache["answer"].set(key, answer)
+        finally:
+            self.metrics.observe(trace)
 
 if __name__ == "__main__":
     tiny_llm = load_tiny_vietnamese_llm()
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import pickle
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.graph_index import GraphIndex
+from src.node_table import NodeTable
+
+# 2: tên node đã gộp theo node_key (NodeTable)
+# 3: kèm bảng khoá node_key -> id và alias của NodeTable, nạp lại không cần fold_name
+SNAPSHOT_VERSION = 3
+# Tăng khi EntityGazetteer/AnchorResolver đổi cấu trúc, để bỏ các file .lookup.pkl cũ
+LOOKUP_VERSION = 1
+
+
+def snapshot_path_for(source: str) -> str:
+    """Default snapshot location next to the source CSV (``edges.csv`` -> ``edges.snapshot.npz``)."""
+    return os.path.splitext(source)[0] + ".snapshot.npz"
+
+
+def lookup_path_for(snapshot_path: str) -> str:
+    """Gazetteer/resolver file next to a snapshot (``edges.snapshot.npz`` -> ``edges.lookup.pkl``)."""
+    path = os.path.splitext(snapshot_path)[0]
+    if path.endswith(".snapshot"):
+        path = path[: -len(".snapshot")]
+    return path + ".lookup.pkl"
+
+
+def file_sha1(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_fingerprint(path: str) -> dict:
+    stat = os.stat(path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha1": file_sha1(path)}
+
+
+def _source_unchanged(path: str, recorded: Optional[dict]) -> bool:
+    if recorded is None or not os.path.exists(path):
+        return False
+    stat = os.stat(path)
+    if stat.st_mtime_ns == recorded["mtime_ns"] and stat.st_size == recorded["size"]:
+        return True
+    return file_sha1(path) == recorded["sha1"]
+
+
+def _pack_strings(values: List[str]):
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    data = blob.tobytes()
+    bounds = offsets.tolist()
+    return [data[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(len(bounds) - 1)]
+
+
+def save_graph_snapshot(
+    index: GraphIndex,
+    path: str,
+    source: Optional[str] = None,
+    nodes_source: Optional[str] = None,
+) -> None:
+    """
+    Write ``index`` as an ``.npz``: UTF-8 node/relation tables, the
+    ``NodeTable`` key and alias tables, plus the int32 edge arrays.
+    ``source`` (the edges CSV) and ``nodes_source`` (the CSV the aliases
+    came from, if it exists) are fingerprinted so stale snapshots are
+    detected.
+    """
+    nodes = index.nodes
+    names_blob, names_offsets = _pack_strings(index.names)
+    relations_blob, relations_offsets = _pack_strings(index.relations)
+    keys_blob, keys_offsets = _pack_strings(list(nodes.ids))
+    aliases_blob, aliases_offsets = _pack_strings(list(nodes.aliases))
+    meta = {"version": SNAPSHOT_VERSION}
+    if source is not None:
+        meta["source"] = source_fingerprint(source)
+    if nodes_source is not None and os.path.exists(nodes_source):
+        meta["nodes_source"] = source_fingerprint(nodes_source)
+
+    tmp_path = path + ".tmp.npz"
+    np.savez(
+        tmp_path,
+        meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+        names_blob=names_blob,
+        names_offsets=names_offsets,
+        relations_blob=relations_blob,
+        relations_offsets=relations_offsets,
+        keys_blob=keys_blob,
+        keys_offsets=keys_offsets,
+        key_ids=np.fromiter(nodes.ids.values(), dtype=np.int32, count=len(nodes.ids)),
+        aliases_blob=aliases_blob,
+        aliases_offsets=aliases_offsets,
+        alias_ids=np.fromiter(nodes.aliases.values(), dtype=np.int32, count=len(nodes.aliases)),
+        sources=index.edge_sources,
+        targets=index.out_targets,
+        relation_ids=index.out_relations,
+    )
+    os.replace(tmp_path, path)
+
+
+def load_graph_snapshot(
+    path: str,
+    source: Optional[str] = None,
+    nodes_source: Optional[str] = None,
+) -> Optional[GraphIndex]:
+    """
+    Load a snapshot written by ``save_graph_snapshot``. Returns ``None`` when
+    it is missing, from another format version, or when ``source`` or
+    ``nodes_source`` changed since it was written (same mtime and size, or
+    else same sha1; a nodes file that appeared or disappeared also counts).
+    The node table is restored from the stored key tables, not re-folded.
+    """
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+        if meta.get("version") != SNAPSHOT_VERSION:
+            return None
+        if source is not None and not _source_unchanged(source, meta.get("source")):
+            return None
+        if nodes_source is not None:
+            recorded = meta.get("nodes_source")
+            if os.path.exists(nodes_source) != (recorded is not None):
+                return None
+            if recorded is not None and not _source_unchanged(nodes_source, recorded):
+                return None
+
+        nodes = NodeTable()
+        nodes.names = _unpack_strings(data["names_blob"], data["names_offsets"])
+        nodes.ids = dict(zip(_unpack_strings(data["keys_blob"], data["keys_offsets"]), data["key_ids"].tolist()))
+        nodes.aliases = dict(
+            zip(_unpack_strings(data["aliases_blob"], data["aliases_offsets"]), data["alias_ids"].tolist())
+        )
+        return GraphIndex(
+            nodes,
+            _unpack_strings(data["relations_blob"], data["relations_offsets"]),
+            data["sources"],
+            data["targets"],
+            data["relation_ids"],
+        )
+
+
+def _names_sha1(names: List[str]) -> str:
+    return hashlib.sha1("\0".join(names).encode("utf-8")).hexdigest()
+
+
+def save_lookup_tables(path: str, names: List[str], gazetteer, resolver) -> None:
+    """Pickle the gazetteer and anchor resolver built from ``names``, keyed by a sha1 of the names."""
+    payload = {
+        "version": LOOKUP_VERSION,
+        "names_sha1": _names_sha1(names),
+        "gazetteer": gazetteer,
+        "resolver": resolver,
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_lookup_tables(path: str, names: List[str]) -> Optional[Tuple[object, object]]:
+    """
+    ``(gazetteer, resolver)`` saved by ``save_lookup_tables``, or ``None``
+    when the file is missing, from another format version, or was built from
+    other node names.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        payload = pickle.load(f)
+    if payload.get("version") != LOOKUP_VERSION or payload.get("names_sha1") != _names_sha1(names):
+        return None
+    return payload["gazetteer"], payload["resolver"]
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class PoolSaturated(Exception):
+    """Raised when every worker is busy and the admission queue is full."""
+
+
+class InferencePool:
+    """
+    Bounded thread pool for the blocking RAG pipeline.
+
+    At most ``max_workers`` requests run at once and at most ``max_queue``
+    more wait for a worker; anything beyond that is rejected immediately with
+    ``PoolSaturated`` instead of piling up behind a long generation. A slot
+    is held until the job really finishes, even if the caller went away.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 8):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rag-worker")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def _admit(self):
+        with self._lock:
+            if self._pending >= self.capacity:
+                raise PoolSaturated(f"{self._pending} requests in flight (capacity {self.capacity})")
+            self._pending += 1
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, fn: Callable[..., T], *args, **kwargs) -> "asyncio.Future[T]":
+        """Admit ``fn`` right away (raising ``PoolSaturated`` if full) and return an awaitable for its result."""
+        self._admit()
+        try:
+            future = self.executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return asyncio.wrap_future(future)
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        return await self.submit(fn, *args, **kwargs)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending = self._pending
+        return {
+            "in_flight": pending,
+            "workers": self.max_workers,
+            "queue_depth": self.max_queue,
+            "capacity": self.capacity,
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,13 +1,60 @@
-
-import pandas as pd
+import os
+from typing import Optional
+from src.GraphBuilder.utils.graph_data import NODE_COLUMNS, GraphData, read_table
 from src.graph_rag import SmartGraphRAG
+from src.graph_snapshot import lookup_path_for, snapshot_path_for
+
+EDGES_PATH = os.getenv(
+    "GRAPH_EDGES_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "final", "edges.csv"),
+)
+
+# Mặc định là nodes.csv cạnh file cạnh
+NODES_PATH = os.getenv("GRAPH_NODES_PATH")
+
+
+def init(
+    rag: SmartGraphRAG,
+    edges_path: str = EDGES_PATH,
+    snapshot_path: Optional[str] = None,
+    data: Optional[GraphData] = None,
+    nodes_path: Optional[str] = NODES_PATH,
+):
+    if not rag.in_memory:
+        # Đồ thị nằm ở backend ngoài (Neo4j): chỉ cần bảng tên node cho gazetteer/resolver
+        rag.build_gazetteer()
+        rag.build_anchor_resolver()
+        print("Done!!")
+        return
+
+    snapshot_path = snapshot_path or snapshot_path_for(edges_path)
+    nodes_path = nodes_path or os.path.join(os.path.dirname(edges_path), "nodes.csv")
+
+    # Snapshot đã gồm alias từ nodes.csv; chỉ đọc lại nodes.csv khi phải dựng lại
+    if rag.load_snapshot(snapshot_path, source=edges_path, nodes_source=nodes_path):
+        print(f"Loaded graph snapshot {snapshot_path}")
+    else:
+        data = data or GraphData.load(edges_path)
+        rag.add_triplets(*data.columns())
 
+        # Link trong nodes.csv trỏ về cùng id node, để nối kết quả Neo4j/crawl bằng link
+        if data.nodes is not None:
+            nodes = data.nodes
+        elif os.path.exists(nodes_path):
+            nodes = read_table(nodes_path, NODE_COLUMNS)
+        else:
+            nodes = None
+        if nodes is not None:
+            rag.add_node_aliases(nodes["link"].tolist(), nodes["name"].tolist())
 
+        rag.save_snapshot(snapshot_path, source=edges_path, nodes_source=nodes_path)
+        print(f"Saved graph snapshot {snapshot_path}")
 
-def init(rag: SmartGraphRAG):
-    df = pd.read_csv("/Users/huynhnguyen/WorkDir/Network/data/final/edges.csv")
-    for i, row in df.iterrows():
-        rag.add_triplet(row["src"], row["des"], row["type"])
-        # rag.add_triplet(row["des"], row["src"], row["type"])
-        
+    # Gazetteer/resolver chỉ phụ thuộc bảng tên node: nạp lại bản đã lưu nếu tên không đổi
+    lookup_path = lookup_path_for(snapshot_path)
+    if not rag.load_lookups(lookup_path):
+        rag.build_gazetteer()
+        rag.build_anchor_resolver()
+        rag.save_lookups(lookup_path)
+    rag.load_edge_embeddings()
     print("Done!!")
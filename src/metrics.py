@@ -0,0 +1,121 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition model, with optional labels."""
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str):
+        with self._lock:
+            # [bucket counts..., +Inf count, sum]
+            series = self._series.setdefault(labelvalues, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for labelvalues, values in sorted(series.items()):
+            names = self.labelnames + ("le",)
+            for bound, count in zip(self.buckets, values):
+                lines.append(f"{self.name}_bucket{_labels(names, labelvalues + (_format_value(bound),))} {_format_value(count)}")
+            lines.append(f"{self.name}_bucket{_labels(names, labelvalues + ('+Inf',))} {_format_value(values[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labelvalues)} {_format_value(values[-2])}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labelvalues)} {_format_value(values[-1])}")
+        return lines
+
+
+def render_samples(name: str, help: str, kind: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> List[str]:
+    """Render a gauge/counter family from ``(labels, value)`` pairs."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(tuple(labels), tuple(labels.values()))} {_format_value(value)}")
+    return lines
+
+
+class QueryTrace:
+    """Timings (seconds) and counts collected while answering one question."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.total: Optional[float] = None
+
+    @contextmanager
+    def span(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0.0) + time.perf_counter() - start
+
+    def count(self, name: str, value: int):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def finish(self) -> "QueryTrace":
+        if self.total is None:
+            self.total = time.perf_counter() - self.started
+        return self
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "total_ms": round((self.total or 0.0) * 1000, 3),
+            "stages_ms": {stage: round(seconds * 1000, 3) for stage, seconds in self.timings.items()},
+            "counts": dict(self.counts),
+        }
+
+
+class PipelineMetrics:
+    """Aggregates ``QueryTrace``s into Prometheus histograms."""
+
+    def __init__(self):
+        self.query_seconds = Histogram("graphrag_query_seconds", "End-to-end SmartGraphRAG.query latency.")
+        self.stage_seconds = Histogram(
+            "graphrag_stage_seconds", "Latency of each SmartGraphRAG pipeline stage.", labelnames=("stage",)
+        )
+        self.counts = Histogram(
+            "graphrag_query_items",
+            "Per-query counts: anchors, neighbor/path candidates, generated tokens.",
+            buckets=COUNT_BUCKETS,
+            labelnames=("item",),
+        )
+
+    def observe(self, trace: QueryTrace):
+        trace.finish()
+        self.query_seconds.observe(trace.total)
+        for stage, seconds in trace.timings.items():
+            self.stage_seconds.observe(seconds, stage)
+        for item, value in trace.counts.items():
+            self.counts.observe(value, item)
+
+    def render(self) -> List[str]:
+        return self.query_seconds.render() + self.stage_seconds.render() + self.counts.render()
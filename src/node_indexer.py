@@ -0,0 +1,40 @@
+import hashlib
+from typing import Iterable
+
+from tqdm import tqdm
+
+
+def node_doc_id(name: str) -> str:
+    """Stable Chroma id of a node document, so re-indexing never duplicates it."""
+    return hashlib.sha1(f"node:{name}".encode("utf-8")).hexdigest()
+
+
+def index_node_names(
+    vector_store,
+    names: Iterable[str],
+    batch_size: int = 256,
+    show_progress: bool = True,
+) -> int:
+    """
+    Add node names to the vector store in chunks of ``batch_size``: one
+    existence check, one encoder batch and one Chroma write per chunk.
+    Names whose id is already stored are skipped, so an interrupted run can
+    simply be restarted. Returns the number of newly added nodes.
+    """
+    unique = list(dict.fromkeys(name for name in names if name))
+    added = 0
+    with tqdm(total=len(unique), desc="Indexing nodes", unit="node", disable=not show_progress) as progress:
+        for start in range(0, len(unique), batch_size):
+            chunk = unique[start:start + batch_size]
+            ids = [node_doc_id(name) for name in chunk]
+            existing = set(vector_store.get(ids=ids, include=[])["ids"])
+            new = [(name, doc_id) for name, doc_id in zip(chunk, ids) if doc_id not in existing]
+            if new:
+                vector_store.add_texts(
+                    [name for name, _ in new],
+                    metadatas=[{"type": "node"} for _ in new],
+                    ids=[doc_id for _, doc_id in new],
+                )
+                added += len(new)
+            progress.update(len(chunk))
+    return added
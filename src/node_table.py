@@ -0,0 +1,101 @@
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import unquote, urlsplit
+
+import numpy as np
+
+from src.text_norm import fold_name
+
+
+def display_name(raw: str) -> str:
+    """Readable form of a node string: wiki links become their title, the ``/`` of raw link paths is dropped."""
+    raw = raw.strip()
+    path = urlsplit(raw).path if raw.startswith(("http://", "https://")) else raw
+    if path.startswith("/wiki/"):
+        return unquote(path[len("/wiki/"):]).replace("_", " ").strip()
+    return raw.lstrip("/").strip() or raw
+
+
+def node_key(raw: str) -> str:
+    """
+    Identity of a node string: the ``canonical()`` form of
+    ``src/0_utils/clean_nodes.py`` (via ``fold_name``) of its display name, so
+    "Aage Bohr", "/Aage Bohr" and ``/wiki/Aage_Bohr`` are the same node.
+    Names that fold to nothing (non-Latin scripts) keep their lower-cased text.
+    """
+    name = display_name(raw)
+    return fold_name(name) or name.casefold()
+
+
+class NodeTable:
+    """
+    Interned node ids of the RAG graph.
+
+    Every node is a dense integer id ``0..len - 1``; ``names[i]`` is the
+    display name used only when formatting context. Names, raw link paths and
+    URLs resolve to ids through their ``node_key`` and, for spellings that do
+    not fold to the same key (e.g. a ``nodes.csv`` link whose title differs
+    from the edge name), through ``aliases``.
+    """
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.aliases: Dict[str, int] = {}
+
+    @classmethod
+    def from_names(cls, names: Iterable[str]) -> "NodeTable":
+        """One id per name, in order, even when two names share a key (the first one owns the key)."""
+        table = cls()
+        for i, name in enumerate(names):
+            table.names.append(name)
+            key = node_key(name)
+            if table.ids.setdefault(key, i) != i:
+                table.aliases[name] = i
+        return table
+
+    def copy(self) -> "NodeTable":
+        table = NodeTable()
+        table.names = list(self.names)
+        table.ids = dict(self.ids)
+        table.aliases = dict(self.aliases)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def intern(self, raw: str) -> int:
+        node = self.aliases.get(raw)
+        if node is not None:
+            return node
+        key = node_key(raw)
+        node = self.ids.get(key)
+        if node is None:
+            node = self.ids[key] = len(self.names)
+            self.names.append(display_name(raw))
+        return node
+
+    def intern_many(self, raws: Iterable[str]) -> np.ndarray:
+        return np.fromiter((self.intern(raw) for raw in raws), dtype=np.int32)
+
+    def lookup(self, raw: str) -> Optional[int]:
+        node = self.aliases.get(raw)
+        if node is None and isinstance(raw, str):
+            node = self.ids.get(node_key(raw))
+        return node
+
+    def add_aliases(self, aliases: Iterable[str], names: Iterable[str]) -> int:
+        """
+        Make each alias (e.g. a ``nodes.csv`` link) resolve to the node of the
+        paired name. Pairs whose name is not in the table are skipped; returns
+        the number of aliases added.
+        """
+        added = 0
+        for alias, name in zip(aliases, names):
+            if not isinstance(alias, str) or not isinstance(name, str):
+                continue
+            node = self.lookup(name)
+            if node is None or self.lookup(alias) == node:
+                continue
+            self.aliases[alias] = node
+            added += 1
+        return added
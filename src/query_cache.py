@@ -0,0 +1,89 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+MISSING = object()
+
+
+def normalize_question(question: str) -> str:
+    """Cache key form of a question: NFC, case-folded, whitespace collapsed."""
+    question = unicodedata.normalize("NFC", question).casefold()
+    return re.sub(r"\s+", " ", question).strip()
+
+
+class LRUCache:
+    """Thread-safe LRU cache with an optional per-entry TTL and hit/miss counters."""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (self.ttl is None or time.monotonic() - entry[0] < self.ttl):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+class QueryCache:
+    """
+    Per-stage caches for ``SmartGraphRAG.query``: extracted entities, resolved
+    anchors, assembled context and final answer. Every tier is dropped when
+    the graph/vector-store version passed to ``sync`` changes.
+    """
+
+    TIERS = ("entities", "anchors", "context", "answer")
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 3600.0):
+        self.tiers: Dict[str, LRUCache] = {name: LRUCache(maxsize, ttl) for name in self.TIERS}
+        self.version: Optional[Hashable] = None
+        self._lock = threading.Lock()
+
+    def __getitem__(self, tier: str) -> LRUCache:
+        return self.tiers[tier]
+
+    def sync(self, version: Hashable):
+        with self._lock:
+            if version == self.version:
+                return
+            self.version = version
+        for tier in self.tiers.values():
+            tier.clear()
+
+    def clear(self):
+        for tier in self.tiers.values():
+            tier.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {name: tier.stats() for name, tier in self.tiers.items()}
+
@@ -0,0 +1,25 @@
+import re
+import unicodedata
+
+
+def strip_accents(s: str) -> str:
+    """Remove Vietnamese diacritics, including the stroke of đ/Đ that NFD keeps."""
+    s = s.replace("đ", "d").replace("Đ", "D")
+    return ''.join(
+        c for c in unicodedata.normalize('NFD', s)
+        if unicodedata.category(c) != 'Mn'
+    )
+
+
+def fold_name(n: str) -> str:
+    """
+    Accent-folded, lower-case form used to match entity names, following
+    ``canonical()`` in ``src/0_utils/clean_nodes.py``.
+    """
+    if not isinstance(n, str):
+        return ""
+    n = n.lower().strip()
+    n = strip_accents(n)
+    n = re.sub(r"[^a-z0-9\s\-']", " ", n)
+    n = re.sub(r"\s+", " ", n).strip()
+    return n
@@ -0,0 +1,47 @@
+import pytest
+
+from GraphBuilder.crawl import infobox
+
+PARSERS = ["lxml", "html.parser"]
+
+
+def _page(cells: str) -> bytes:
+    return (
+        "<html><body><h1>Nhà khoa học</h1>"
+        '<table class="infobox"><tr><th class="infobox-label">Nơi công tác</th>'
+        f"<td>{cells}</td></tr></table></body></html>"
+    ).encode("utf-8")
+
+
+@pytest.fixture(params=PARSERS)
+def parser(request, monkeypatch):
+    if request.param == "lxml":
+        pytest.importorskip("lxml.html")
+    else:
+        pytest.importorskip("bs4")
+        monkeypatch.setattr(infobox, "lxml_html", None)
+    return request.param
+
+
+@pytest.mark.parametrize(
+    "cells, expected",
+    [
+        ('<a href="/wiki/NBI">NBI</a>', ["/wiki/NBI"]),
+        ('<a href="/wiki/NBI"><span><b>NBI</b></span></a>', ["/wiki/NBI"]),
+        # .string của BeautifulSoup là None khi còn text khác, kể cả chỉ là khoảng trắng
+        ('<a href="/wiki/NBI"> <span>NBI</span></a>', []),
+        ('<a href="/wiki/NBI"><span>NBI</span> </a>', []),
+        ('<a href="/wiki/NBI"><span>N</span><span>BI</span></a>', []),
+        ('<a href="/wiki/NBI"></a>', []),
+    ],
+)
+def test_links_follow_bs4_string(parser, cells, expected):
+    page = infobox.extract_page(_page(cells), link_labels=["Nơi công tác"])
+    assert page.labels == ["Nơi công tác"]
+    assert [href for _, href in page.links] == expected
+
+
+def test_vietnamese_text(parser):
+    page = infobox.extract_page(_page('<a href="/wiki/Đại_học_Huế">Đại học Huế</a>'), link_labels=["Nơi công tác"])
+    assert page.name == "Nhà khoa học"
+    assert page.links == [("Nơi công tác", "/wiki/Đại_học_Huế")]